@@ -3,6 +3,18 @@ ASGI config for levelup project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Read requests (game types, games, events and the profile) can be served
+from a bounded thread pool, which caps how many run at once and reuses
+its database connections. Launch with any ASGI server, for example:
+
+    LEVELUP_ASYNC_READS=1 LEVELUP_ASYNC_READ_THREADS=32 \
+        uvicorn levelup.asgi:application --host 0.0.0.0 --port 8000
+
+Each pool thread keeps its own database connection, so size
+LEVELUP_ASYNC_READ_THREADS to what the database can take. Writes, like
+any synchronous view, run on a thread Django starts for each request,
+so any number of them can run at once.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 """
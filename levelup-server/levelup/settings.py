@@ -10,12 +10,30 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_flag(name, default=False):
+    """Boolean setting from an environment variable like `1` or `true`"""
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name):
+    """Whole number setting from an environment variable, None if unset"""
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+# Running `manage.py test`
+TESTING = sys.argv[1:2] == ['test']
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.1/howto/deployment/checklist/
 
@@ -45,13 +63,36 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'levelupapi.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'levelupapi.throttling.GamerRateThrottle',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Proxies in front of the app, whose X-Forwarded-For entries can be
+    # trusted. With none, clients are told apart by REMOTE_ADDR, as a
+    # client can send any X-Forwarded-For it likes.
+    'NUM_PROXIES': env_int('LEVELUP_NUM_PROXIES') or 0,
+}
+
+# Rate limits
+#
+# Token buckets kept in the cache, see levelupapi/throttling.py. `gamer`
+# applies to every API request, per gamer. `login` and `register` apply
+# per IP address, and `login_username` to attempts at each username.
+# Set LEVELUP_NUM_PROXIES behind a proxy, so the address is the client's.
+# Off while testing, where every request comes from the same address.
+
+LEVELUP_THROTTLE_ENABLED = env_flag('LEVELUP_THROTTLE_ENABLED', not TESTING)
+LEVELUP_THROTTLE_RATES = {
+    'gamer': os.environ.get('LEVELUP_THROTTLE_GAMER', '600/minute'),
+    'login': os.environ.get('LEVELUP_THROTTLE_LOGIN', '20/minute'),
+    'login_username': os.environ.get('LEVELUP_THROTTLE_LOGIN_USERNAME', '5/minute'),
+    'register': os.environ.get('LEVELUP_THROTTLE_REGISTER', '10/hour'),
 }
 
 CORS_ORIGIN_WHITELIST = (
@@ -60,6 +101,9 @@ CORS_ORIGIN_WHITELIST = (
 )
 
 MIDDLEWARE = [
+    # First, so the timings cover every other middleware
+    'levelupapi.middleware.InstrumentationMiddleware',
+    'levelupapi.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -98,9 +142,219 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds a connection is kept open between requests, 0 to close
+        # it after each request and None to keep it open indefinitely
+        'CONN_MAX_AGE': int(os.environ.get('LEVELUP_CONN_MAX_AGE', 60)),
+        # Check a persistent connection still works before reusing it
+        'CONN_HEALTH_CHECKS': env_flag('LEVELUP_CONN_HEALTH_CHECKS', True),
     }
 }
 
+# Read replica
+#
+# Set LEVELUP_REPLICA_NAME to the replica's database file and GET
+# requests to the game type, game, event and profile views read from it,
+# while everything else uses the primary. To try it locally with two
+# SQLite files:
+#
+#   LEVELUP_REPLICA_NAME=replica.sqlite3 python manage.py migrate --database replica
+#   cp db.sqlite3 replica.sqlite3
+#
+# A user who has just written keeps reading from the primary for
+# LEVELUP_READ_YOUR_WRITES_SECONDS, so they see their own changes. That
+# is remembered in the cache, so every worker has to share one: set
+# LEVELUP_CACHE_BACKEND to e.g. Redis or Memcached along with a replica.
+
+LEVELUP_READ_DATABASE = None
+
+if os.environ.get('LEVELUP_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['LEVELUP_REPLICA_NAME'],
+        # Tests read and write one database
+        'TEST': {'MIRROR': 'default'},
+    }
+    LEVELUP_READ_DATABASE = 'replica'
+
+DATABASE_ROUTERS = ['levelupapi.routers.ReplicaRouter']
+
+LEVELUP_READ_YOUR_WRITES_SECONDS = int(os.environ.get('LEVELUP_READ_YOUR_WRITES_SECONDS', 5))
+
+# PRAGMAs run on every new SQLite connection, see levelupapi/sqlite.py.
+# WAL lets readers carry on while a write is in progress, and
+# busy_timeout (milliseconds) makes writers queue up for the write lock
+# instead of failing with "database is locked".
+
+LEVELUP_SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('LEVELUP_SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.environ.get('LEVELUP_SQLITE_SYNCHRONOUS', 'normal'),
+    'busy_timeout': int(os.environ.get('LEVELUP_SQLITE_BUSY_TIMEOUT', 5000)),
+    # Negative sizes are in KiB, so about 20MB of page cache
+    'cache_size': int(os.environ.get('LEVELUP_SQLITE_CACHE_SIZE', -20000)),
+    'mmap_size': int(os.environ.get('LEVELUP_SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'temp_store': os.environ.get('LEVELUP_SQLITE_TEMP_STORE', 'memory'),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+#
+# Process local by default. Point LEVELUP_CACHE_BACKEND at
+# django.core.cache.backends.redis.RedisCache and LEVELUP_CACHE_LOCATION
+# at redis://host:port to share the cache between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'LEVELUP_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('LEVELUP_CACHE_LOCATION', 'levelup'),
+    }
+}
+
+# Backends whose entries only the process that wrote them can see
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Whether every worker sees the same cache. Cached entries are dropped
+# when what they hold changes, which only reaches the other workers
+# through a shared cache. A process local cache is shared when the app
+# runs as one process, like `manage.py runserver` does; set
+# LEVELUP_SINGLE_PROCESS for other servers run with a single worker.
+LEVELUP_SINGLE_PROCESS = env_flag('LEVELUP_SINGLE_PROCESS', DEBUG)
+LEVELUP_CACHE_SHARED = (LEVELUP_SINGLE_PROCESS
+                        or CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES)
+
+
+def shared_cache_timeout(name, default):
+    """Seconds to cache something that is invalidated on change
+
+    Without a shared cache, nothing is cached (0) unless the environment
+    variable `name` asks for it, which is refused.
+    """
+    timeout = env_int(name)
+    if timeout is None:
+        return default if LEVELUP_CACHE_SHARED else 0
+    if timeout and not LEVELUP_CACHE_SHARED:
+        raise ImproperlyConfigured(
+            f'{name} needs a cache shared by every worker, set LEVELUP_CACHE_BACKEND')
+    return timeout
+
+
+if LEVELUP_READ_DATABASE and not LEVELUP_CACHE_SHARED:
+    raise ImproperlyConfigured(
+        'LEVELUP_REPLICA_NAME needs a cache shared by every worker, '
+        'set LEVELUP_CACHE_BACKEND')
+
+# Seconds an auth token's user and gamer are remembered for. Logging out
+# drops the token, so 0 (off) without a shared cache, where every other
+# worker would keep accepting it.
+LEVELUP_AUTH_CACHE_TIMEOUT = shared_cache_timeout('LEVELUP_AUTH_CACHE_TIMEOUT', 300)
+
+# Seconds a version of the game type catalog, and so its ETag, lasts. A
+# change starts a new version, which only reaches other workers through
+# a shared cache. Without one, each worker starts a new version this
+# often, picking up changes made elsewhere.
+LEVELUP_GAMETYPES_VERSION_TIMEOUT = (env_int('LEVELUP_GAMETYPES_VERSION_TIMEOUT')
+                                     or (None if LEVELUP_CACHE_SHARED else 60))
+
+# Seconds a gamer's profile is cached for, changes invalidate it sooner.
+# 0 turns the cache off.
+LEVELUP_PROFILE_CACHE_TIMEOUT = shared_cache_timeout('LEVELUP_PROFILE_CACHE_TIMEOUT', 600)
+
+
+# Async reads
+#
+# When served over ASGI, GET requests to the game type, game, event and
+# profile views run on a pool of this many threads, which reuse their
+# database connections, instead of on a new thread per request. See
+# levelup/asgi.py.
+
+LEVELUP_ASYNC_READS = env_flag('LEVELUP_ASYNC_READS')
+LEVELUP_ASYNC_READ_THREADS = int(os.environ.get('LEVELUP_ASYNC_READ_THREADS', 16))
+
+
+# Metrics
+#
+# LEVELUP_METRICS_ENABLED adds a Server-Timing header to each response,
+# with its total, database and serializer time, and serves histograms of
+# them per view action on /metrics for Prometheus. When it's off the
+# middleware isn't loaded at all.
+
+LEVELUP_METRICS_ENABLED = env_flag('LEVELUP_METRICS_ENABLED')
+
+
+# Query inspection
+#
+# A share of requests, from 0 (off) to 1 (all), have their queries
+# inspected. A statement run more than LEVELUP_N_PLUS_ONE_THRESHOLD times
+# in one request is logged as an N+1, and any statement taking over
+# LEVELUP_SLOW_QUERY_MS as slow, to the levelupapi.queries log as JSON.
+
+LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE = float(os.environ.get('LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE', 0))
+LEVELUP_N_PLUS_ONE_THRESHOLD = int(os.environ.get('LEVELUP_N_PLUS_ONE_THRESHOLD', 5))
+LEVELUP_SLOW_QUERY_MS = float(os.environ.get('LEVELUP_SLOW_QUERY_MS', 100))
+
+# Game search
+#
+# On SQLite, `/games?q=` searches an FTS5 index of game titles and
+# descriptions (`manage.py rebuild_game_search` rebuilds it). Title
+# matches are ranked ahead of description matches, and only the newest
+# LEVELUP_SEARCH_CANDIDATES of each are ranked. That bounds the cost of
+# searching for very common words, at the price of leaving their older
+# matches out, see `Games.list`.
+
+LEVELUP_SEARCH_CANDIDATES = int(os.environ.get('LEVELUP_SEARCH_CANDIDATES', 1000))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # Messages of the query log are JSON already
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'queries': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'levelupapi.queries': {
+            'handlers': ['queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.1/topics/auth/passwords/
+#
+# LEVELUP_PASSWORD_HASHER picks the hasher for new passwords: pbkdf2,
+# scrypt or argon2 (needs argon2-cffi). The others stay listed so
+# existing passwords still verify, and are rehashed on the next login.
+# Each hasher's cost can be tuned, leave it unset for Django's default.
+# `manage.py bench_login` times logins at a given cost.
+
+LEVELUP_PASSWORD_HASHER = os.environ.get('LEVELUP_PASSWORD_HASHER', 'pbkdf2')
+LEVELUP_PBKDF2_ITERATIONS = env_int('LEVELUP_PBKDF2_ITERATIONS')
+LEVELUP_SCRYPT_WORK_FACTOR = env_int('LEVELUP_SCRYPT_WORK_FACTOR')
+LEVELUP_ARGON2_TIME_COST = env_int('LEVELUP_ARGON2_TIME_COST')
+
+password_hashers = {
+    'pbkdf2': 'levelupapi.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'levelupapi.hashers.ScryptPasswordHasher',
+    'argon2': 'levelupapi.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [password_hashers.pop(LEVELUP_PASSWORD_HASHER), *password_hashers.values()]
+
+if TESTING:
+    # Tests create accounts constantly, don't spend time hashing
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
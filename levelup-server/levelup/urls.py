@@ -17,7 +17,7 @@ from rest_framework import routers
 from levelupapi.views import GameTypes
 from django.conf.urls import include
 from django.urls import path
-from levelupapi.views import register_user, login_user
+from levelupapi.views import register_user, login_user, logout_user, metrics
 from levelupapi.views import GameTypes, Games, Events, Profile
 
 
@@ -34,5 +34,9 @@ urlpatterns = [
     path('register', register_user),
     # Requests to http://localhost:8000/login will be routed to the login_user function
     path('login', login_user),
+    # Requests to http://localhost:8000/logout will be routed to the logout_user function
+    path('logout', logout_user),
+    # Request histograms for Prometheus, when LEVELUP_METRICS_ENABLED is set
+    path('metrics', metrics),
     path('api-auth', include('rest_framework.urls', namespace='rest_framework')),
 ]
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class LevelupapiConfig(AppConfig):
     name = 'levelupapi'
+
+    def ready(self):
+        # Connect the signal handlers
+        from levelupapi import signals  # pylint: disable=unused-import,import-outside-toplevel
+        # Register the system checks
+        from levelupapi import search  # pylint: disable=unused-import,import-outside-toplevel
@@ -0,0 +1,68 @@
+"""Token authentication backed by the cache"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authentication import TokenAuthentication
+from levelupapi.models import Gamer
+
+
+def token_cache_key(key):
+    """Cache key holding what a token resolves to"""
+    return f'levelup:auth-token:{key}'
+
+
+def forget_token(key):
+    """Drop a token from the cache, e.g. after logout or rotation"""
+    cache.delete(token_cache_key(key))
+
+
+class GamerAuthenticationMixin:
+    """Authentication class mixin exposing the user's gamer as `request.gamer`
+
+    The gamer is looked up, with its user, the first time a view uses it
+    and at most once per request. Authentication classes that already
+    know the gamer set `self.gamer` while authenticating to skip the
+    lookup altogether.
+    """
+    gamer = None
+
+    def authenticate(self, request):
+        credentials = super().authenticate(request)
+
+        if credentials is not None:
+            if self.gamer is not None:
+                request.gamer = self.gamer
+            else:
+                user = credentials[0]
+                request.gamer = SimpleLazyObject(
+                    lambda: Gamer.objects.select_related('user').get(user=user))
+
+        return credentials
+
+
+class CachedTokenAuthentication(GamerAuthenticationMixin, TokenAuthentication):
+    """Token authentication that remembers each token's user and gamer
+
+    A cache hit skips both the token/user query and the gamer query.
+    Cached entries expire after `LEVELUP_AUTH_CACHE_TIMEOUT` seconds and
+    are dropped as soon as the token, its user or its gamer changes. That
+    only reaches every worker through a shared cache, so without one the
+    timeout is 0 and nothing is cached.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+
+        if cached is None:
+            # Checks the token exists and its user is active
+            user, token = super().authenticate_credentials(key)
+            gamer = Gamer.objects.filter(user=user).first()
+            if gamer is not None:
+                gamer.user = user
+            cached = (token, gamer)
+            if settings.LEVELUP_AUTH_CACHE_TIMEOUT:
+                cache.set(cache_key, cached, settings.LEVELUP_AUTH_CACHE_TIMEOUT)
+
+        token, self.gamer = cached
+        return (token.user, token)
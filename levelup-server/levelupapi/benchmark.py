@@ -0,0 +1,150 @@
+"""Latency and query count benchmarks of every endpoint"""
+import json
+import re
+import statistics
+import time
+from datetime import date, timedelta
+from django.db import connection
+from django.http import QueryDict
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, Game, GameType
+from levelupapi.seeding import DESCRIPTION_WORDS, TITLE_WORDS
+from levelupapi.views.event import EventSerializer, filter_events
+from levelupapi.views.queryplan import eager_load
+
+# Rows created at each scale factor by `bench_endpoints`
+SCALES = {
+    'small': {'gamers': 100, 'games': 50, 'events': 500, 'signups_per_event': 4},
+    'medium': {'gamers': 1000, 'games': 200, 'events': 5000, 'signups_per_event': 6},
+    'large': {'gamers': 10000, 'games': 1000, 'events': 100000, 'signups_per_event': 8},
+}
+
+
+def summarize(timings):
+    """Percentiles and mean of a list of milliseconds"""
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50_ms': round(percentiles[49], 2),
+        'p95_ms': round(percentiles[94], 2),
+        'p99_ms': round(percentiles[98], 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+    }
+
+
+def event_filters(gamer):
+    """Query strings for the filters of the events list, by name"""
+    week = (date.today() + timedelta(days=7)).isoformat()
+    game = Game.objects.order_by('pk').first()
+    return {
+        'upcoming': '',
+        'this week': f'to={week}',
+        'game': f'game={game.pk}',
+        'game type this week': f'game_type={game.game_type_id}&to={week}',
+        'location': 'location=Basement',
+        'organizer': f'organizer={gamer.pk}',
+        'joined': 'joined=true',
+        'not joined this week': f'joined=false&to={week}',
+    }
+
+
+def event_filter_plans(gamer):
+    """Whether each filter of the events list is answered from an index
+
+    Returns:
+        dict -- `index_backed` and the query plan, by filter name
+    """
+    plans = {}
+    for name, query in event_filters(gamer).items():
+        events = eager_load(Event.objects.all(), EventSerializer())
+        plan = filter_events(events, QueryDict(query), gamer).explain()
+        plans[name] = {
+            'index_backed': re.search(r'\bSCAN levelupapi_event\b', plan) is None,
+            'plan': plan.splitlines(),
+        }
+    return plans
+
+
+def routes(gamer, password):
+    """Requests covering every route, as (name, method, path, body) callables
+
+    Each is a function of the iteration number, so consecutive requests
+    walk through different rows in a reproducible order.
+    """
+    game_ids = list(Game.objects.order_by('pk').values_list('pk', flat=True)[:100])
+    event_ids = list(Event.objects.order_by('pk').values_list('pk', flat=True)[:100])
+    game_type_ids = list(GameType.objects.order_by('pk').values_list('pk', flat=True))
+    username = gamer.user.username
+
+    return [
+        ('POST /login', lambda i: ('post', '/login', {'username': username, 'password': password})),
+        ('POST /register', lambda i: ('post', '/register', {
+            'username': f'bench{time.time_ns()}', 'password': password, 'email': 'bench@levelup.test',
+            'first_name': 'Bench', 'last_name': str(i), 'bio': 'Benchmark'})),
+        ('GET /gametypes', lambda i: ('get', '/gametypes', None)),
+        ('GET /gametypes/<id>', lambda i: ('get', f'/gametypes/{game_type_ids[i % len(game_type_ids)]}', None)),
+        ('GET /games', lambda i: ('get', '/games', None)),
+        ('GET /games?pagination=cursor', lambda i: ('get', '/games?pagination=cursor', None)),
+        # A selective word, a common prefix, and a word limited by type
+        ('GET /games?q=<word>', lambda i: ('get', f'/games?q={TITLE_WORDS[i % len(TITLE_WORDS)]}', None)),
+        ('GET /games?q=<prefix>', lambda i: ('get', '/games?q=co', None)),
+        ('GET /games?q=<word>&type=<id>', lambda i: (
+            'get', f'/games?q={DESCRIPTION_WORDS[i % len(DESCRIPTION_WORDS)]}&type={game_type_ids[0]}', None)),
+        ('GET /games/<id>', lambda i: ('get', f'/games/{game_ids[i % len(game_ids)]}', None)),
+        ('POST /games', lambda i: ('post', '/games', {
+            'title': f'Bench {i}', 'game_type': game_type_ids[0],
+            'number_of_players': 4, 'description': 'Benchmark'})),
+        ('GET /events', lambda i: ('get', '/events', None)),
+        ('GET /events?pagination=cursor', lambda i: ('get', '/events?pagination=cursor', None)),
+        *[(f'GET /events ({name})', lambda i, query=query: ('get', f'/events?{query}', None))
+          for name, query in event_filters(gamer).items() if query],
+        ('GET /events/<id>', lambda i: ('get', f'/events/{event_ids[i % len(event_ids)]}', None)),
+        # Signing up and leaving in turn keeps the data unchanged
+        ('POST|DELETE /events/<id>/signup', lambda i: (
+            'post' if i % 2 == 0 else 'delete', f'/events/{event_ids[i // 2 % len(event_ids)]}/signup', None)),
+        ('GET /events/export', lambda i: ('get', '/events/export?format=ndjson', None)),
+        ('GET /profile', lambda i: ('get', '/profile', None)),
+    ]
+
+
+def run(gamer, password, requests=50, warmup=5):
+    """Time every route, as `gamer`, in the current database
+
+    Returns:
+        dict -- Latency percentiles, queries per request, throughput and
+        status codes seen, by route
+    """
+    token = Token.objects.get_or_create(user=gamer.user)[0].key
+    client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+    results = {}
+
+    for name, build in routes(gamer, password):
+        timings = []
+        queries = 0
+        statuses = set()
+
+        for i in range(warmup + requests):
+            method, path, body = build(i)
+            kwargs = {} if body is None else {'data': json.dumps(body), 'content_type': 'application/json'}
+
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries += len(captured)
+                statuses.add(response.status_code)
+
+        results[name] = {
+            **summarize(timings),
+            'queries_per_request': round(queries / requests, 2),
+            'requests_per_second': round(1000 * len(timings) / sum(timings), 1),
+            'statuses': sorted(statuses),
+        }
+
+    return results
@@ -0,0 +1,36 @@
+"""Password hashers whose cost is set in settings
+
+Each hasher keeps the algorithm name of the Django hasher it extends,
+so existing password hashes still verify. When the cost changes, a
+gamer's hash is upgraded to the new cost the next time they log in.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with `LEVELUP_PBKDF2_ITERATIONS` iterations"""
+    cost_setting = 'LEVELUP_PBKDF2_ITERATIONS'
+
+    @property
+    def iterations(self):
+        return getattr(settings, self.cost_setting) or hashers.PBKDF2PasswordHasher.iterations
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """Scrypt with a work factor of `LEVELUP_SCRYPT_WORK_FACTOR`, a power of 2"""
+    cost_setting = 'LEVELUP_SCRYPT_WORK_FACTOR'
+
+    @property
+    def work_factor(self):
+        return getattr(settings, self.cost_setting) or hashers.ScryptPasswordHasher.work_factor
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 with `LEVELUP_ARGON2_TIME_COST` passes, needs `argon2-cffi`"""
+    cost_setting = 'LEVELUP_ARGON2_TIME_COST'
+
+    @property
+    def time_cost(self):
+        return getattr(settings, self.cost_setting) or hashers.Argon2PasswordHasher.time_cost
+
@@ -0,0 +1,215 @@
+"""Bulk import of games and events from NDJSON or CSV"""
+import csv
+import json
+import time
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from levelupapi.models import Event, Game, Gamer, GameType
+
+FORMATS = ('ndjson', 'csv')
+
+
+def read_rows(lines, format):  # pylint: disable=redefined-builtin
+    """Rows of an NDJSON or CSV document
+
+    Method arguments:
+      lines -- Iterable of text lines, e.g. an open file
+      format -- `ndjson` or `csv`
+
+    Returns:
+        generator -- A dict per row. Lines that aren't valid JSON are
+        yielded as None, so they're reported along with the other errors.
+    """
+    if format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+class ImportReport:
+    """Outcome of an import, and how long it took"""
+    # Errors beyond this many are counted but not listed
+    max_errors = 100
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def add_error(self, row, errors):
+        """Record why a row, numbered from 1, wasn't imported"""
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    @property
+    def rows_per_second(self):
+        return round(self.rows / self.seconds) if self.seconds else self.rows
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+class Importer:
+    """Validate rows and bulk insert them, a chunk at a time
+
+    Each chunk costs one query per referenced model, to check that the
+    referenced rows exist, and one insert in its own transaction. Rows
+    with errors are skipped and reported, the rest are still imported.
+    """
+    model = None
+    # Columns read from each row
+    fields = ()
+    # Columns referencing other rows, and the model they reference
+    references = {}
+
+    def __init__(self, gamer=None, chunk_size=500):
+        """
+        Method arguments:
+          gamer -- Gamer owning every row, instead of the `gamer` column
+          chunk_size -- Rows validated and inserted together
+        """
+        self.gamer = gamer
+        self.chunk_size = chunk_size
+
+    def run(self, rows):
+        """Import rows, as produced by `read_rows`
+
+        Returns:
+            ImportReport -- What was imported and what wasn't
+        """
+        report = ImportReport()
+        started = time.perf_counter()
+
+        chunk = []
+        for number, row in enumerate(rows, start=1):
+            chunk.append((number, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk, report)
+
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def import_chunk(self, chunk, report):
+        """Validate and insert one chunk of numbered rows"""
+        references = dict(self.references)
+        if self.gamer is not None:
+            references.pop('gamer', None)
+
+        built = []
+        rejected = []
+        for number, row in chunk:
+            report.rows += 1
+            if not isinstance(row, dict):
+                rejected.append((number, {"row": ["Expected an object."]}))
+                continue
+
+            instance, errors = self.build(row, references)
+            if errors:
+                rejected.append((number, errors))
+            else:
+                built.append((number, instance))
+
+        # One query per referenced model for the whole chunk
+        existing = {}
+        for name, model in references.items():
+            attname = self.model._meta.get_field(name).attname
+            ids = {getattr(instance, attname) for _, instance in built}
+            existing[name] = set(
+                model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+        instances = []
+        for number, instance in built:
+            errors = {}
+            for name, model in references.items():
+                pk = getattr(instance, self.model._meta.get_field(name).attname)
+                if pk not in existing[name]:
+                    errors[name] = [f"{model.__name__} {pk} does not exist."]
+            if errors:
+                rejected.append((number, errors))
+            else:
+                instances.append(instance)
+
+        for number, errors in sorted(rejected, key=lambda error: error[0]):
+            report.add_error(number, errors)
+
+        with transaction.atomic():
+            self.model.objects.bulk_create(instances)
+        report.created += len(instances)
+
+    def build(self, row, references):
+        """Unsaved instance for a row, and any errors in its values
+
+        Returns:
+            tuple -- (instance, dict of error messages by column)
+        """
+        instance = self.model()
+        errors = {}
+
+        if self.gamer is not None:
+            instance.gamer = self.gamer
+
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            if name == 'gamer' and self.gamer is not None:
+                continue
+            value = row.get(name, None)
+            if name in references:
+                # Foreign keys are checked against the database later
+                try:
+                    value = field.to_python(value)
+                except ValidationError as ex:
+                    errors[name] = ex.messages
+                    continue
+                if value is None:
+                    errors[name] = ["This field is required."]
+                    continue
+            setattr(instance, field.attname, value)
+
+        # Validating a foreign key here would cost a query per row
+        exclude = [field.name for field in self.model._meta.fields
+                   if field.name not in self.fields or field.is_relation]
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as ex:
+            errors.update(ex.message_dict)
+
+        return instance, errors
+
+
+class GameImporter(Importer):
+    model = Game
+    fields = ('title', 'game_type', 'number_of_players', 'description', 'gamer')
+    references = {'game_type': GameType, 'gamer': Gamer}
+
+
+class EventImporter(Importer):
+    model = Event
+    fields = ('event_day', 'event_time', 'game', 'location', 'gamer')
+    references = {'game': Game, 'gamer': Gamer}
+
+
+# Importer for each kind of row
+IMPORTERS = {
+    'games': GameImporter,
+    'events': EventImporter,
+}
@@ -0,0 +1,168 @@
+"""Per request timings of the database and serializers, and their histograms
+
+A request's numbers are collected in a `RequestMetrics` held in a
+context variable, so queries run on the async read pool still count
+towards the request. Histograms live in this process only; each worker
+serves its own on `/metrics`.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from rest_framework.serializers import ListSerializer
+
+# Metrics of the request being served, None outside of one
+current = ContextVar('levelup_request_metrics', default=None)
+
+# Name of the serializer rendering right now, None outside of one
+rendering = ContextVar('levelup_rendering_serializer', default=None)
+
+
+class RequestMetrics:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query's time to the request"""
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+
+def watch_queries(connection):
+    """Time every query run on a new database connection"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def serializer_name(serializer):
+    """Class name of a serializer, e.g. `EventSerializer(many=True)`"""
+    child = getattr(serializer, 'child', None)
+    if child is not None:
+        return f'{type(child).__name__}(many=True)'
+    return type(serializer).__name__
+
+
+def timed_rendering(serializer, render):
+    """Call `render`, adding its time to the request's serializer time
+
+    While it runs, the serializer's name is in `rendering`, so queries
+    can be traced back to it.
+    """
+    reset = rendering.set(serializer_name(serializer))
+    started = time.perf_counter()
+    try:
+        return render()
+    finally:
+        rendering.reset(reset)
+        metrics = current.get()
+        if metrics is not None:
+            metrics.serializer_seconds += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Serializer mixin timing the rendering of its `data`
+
+    Only for the serializers views render. Nested serializers render
+    inside their parent's `data`, so they aren't counted twice. Rendered
+    with `many=True`, the serializer also needs
+    `list_serializer_class = TimedListSerializer` in its Meta.
+    """
+
+    @property
+    def data(self):
+        return timed_rendering(self, lambda: super(TimedSerializerMixin, self).data)
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    """List serializer timing the rendering of its `data`"""
+
+
+class Histogram:
+    """Prometheus style histogram, one series per route"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # route -> [count per bucket..., count, sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route, value):
+        with self.lock:
+            series = self.series.setdefault(route, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def exposition(self):
+        """Lines of the Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for route, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{route="{route}",le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{route="{route}",le="+Inf"}} {series[-2]}')
+                lines.append(f'{self.name}_count{{route="{route}"}} {series[-2]}')
+                lines.append(f'{self.name}_sum{{route="{route}"}} {series[-1]:.6f}')
+        return lines
+
+
+SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HISTOGRAMS = {
+    'seconds': Histogram(
+        'levelup_request_duration_seconds', 'Time spent serving each request', SECONDS),
+    'db_seconds': Histogram(
+        'levelup_request_db_duration_seconds', 'Time spent in database queries per request', SECONDS),
+    'queries': Histogram(
+        'levelup_request_queries', 'Database queries run per request',
+        (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)),
+    'serializer_seconds': Histogram(
+        'levelup_request_serializer_duration_seconds',
+        'Time spent rendering serializers per request', SECONDS),
+}
+
+
+def observe(route, metrics):
+    """Add a finished request's numbers to the histograms"""
+    HISTOGRAMS['seconds'].observe(route, metrics.seconds)
+    HISTOGRAMS['db_seconds'].observe(route, metrics.db_seconds)
+    HISTOGRAMS['queries'].observe(route, metrics.queries)
+    HISTOGRAMS['serializer_seconds'].observe(route, metrics.serializer_seconds)
+
+
+def exposition():
+    """Every histogram in the Prometheus text format"""
+    lines = []
+    for histogram in HISTOGRAMS.values():
+        lines.extend(histogram.exposition())
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(metrics):
+    """`Server-Timing` header value for a request's numbers"""
+    return (
+        f'total;dur={metrics.seconds * 1000:.1f}, '
+        f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries", '
+        f'serializer;dur={metrics.serializer_seconds * 1000:.1f}'
+    )
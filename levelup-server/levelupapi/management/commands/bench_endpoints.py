@@ -0,0 +1,80 @@
+"""Command for benchmarking every endpoint against synthetic data"""
+import json
+import platform
+import subprocess
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from levelupapi import benchmark
+from levelupapi.models import Gamer
+from levelupapi.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database at fixed scale factors and time "
+        "every endpoint, writing latency, queries and throughput as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', action='append', choices=list(benchmark.SCALES),
+            help="Scale factor to run, repeat for several. Defaults to small and medium")
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per route")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per route first")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed of the data")
+        parser.add_argument('--output', help="File to write the JSON report to, instead of stdout")
+
+    def handle(self, *args, **options):
+        scales = options['scale'] or ['small', 'medium']
+        password = 'levelup'
+
+        report = {
+            'commit': self.commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'requests': max(options['requests'], 2),
+            'scales': {},
+        }
+
+        # The real database is never touched
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            with override_settings(LEVELUP_THROTTLE_ENABLED=False):
+                for scale in scales:
+                    call_command('flush', interactive=False, verbosity=0)
+                    cache.clear()
+                    rows = seed(**benchmark.SCALES[scale], password=password, seed=options['seed'])
+                    gamer = Gamer.objects.select_related('user').order_by('pk').first()
+
+                    self.stderr.write(f"Benchmarking {scale}: {rows}")
+                    report['scales'][scale] = {
+                        'rows': rows,
+                        'routes': benchmark.run(
+                            gamer, password, report['requests'], options['warmup']),
+                        'event_filter_plans': benchmark.event_filter_plans(gamer),
+                    }
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def commit(self):
+        """Commit being benchmarked, if this is a git checkout"""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
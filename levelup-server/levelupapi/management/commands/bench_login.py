@@ -0,0 +1,53 @@
+"""Command for timing password checks at different hashing costs"""
+import time
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from levelupapi.benchmark import summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the password check every login runs, with the configured "
+        "hasher at each given cost, to pick a cost that fits the latency budget"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cost', type=int, action='append', default=[],
+            help="Cost to try: PBKDF2 iterations, scrypt work factor or "
+                 "Argon2 time cost. Repeat to compare, defaults to the current cost")
+        parser.add_argument(
+            '--logins', type=int, default=20, help="Password checks timed per cost")
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        cost_setting = getattr(hasher, 'cost_setting', None)
+        if cost_setting is None:
+            raise CommandError(f"{hasher.algorithm} has no tunable cost, see LEVELUP_PASSWORD_HASHER")
+
+        costs = options['cost'] or [getattr(settings, cost_setting)]
+        self.stdout.write(f"{hasher.algorithm}, {options['logins']} logins per cost")
+
+        for cost in costs:
+            with override_settings(**{cost_setting: cost}):
+                timings = self.time_logins(hasher, options['logins'])
+
+            summary = summarize(timings)
+            self.stdout.write(
+                f"{cost_setting}={cost or 'default'}: "
+                f"p50 {summary['p50_ms']:.1f}ms  p95 {summary['p95_ms']:.1f}ms  "
+                f"p99 {summary['p99_ms']:.1f}ms  "
+                f"{1000 / summary['mean_ms']:.1f} logins/s per core")
+
+    def time_logins(self, hasher, logins):
+        """Milliseconds taken by each check of a correct password"""
+        encoded = hasher.encode('correct horse battery staple', hasher.salt())
+
+        timings = []
+        for _ in range(max(logins, 2)):
+            started = time.perf_counter()
+            hasher.verify('correct horse battery staple', encoded)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,52 @@
+"""Command for bulk importing games and events from a file"""
+import os
+from django.core.management.base import BaseCommand, CommandError
+from levelupapi.importer import FORMATS, IMPORTERS, read_rows
+from levelupapi.models import Gamer
+
+
+class Command(BaseCommand):
+    help = "Import games or events from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help="What the file holds")
+        parser.add_argument('path', help="NDJSON or CSV file")
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help="File format, by default taken from the file extension")
+        parser.add_argument(
+            '--gamer', type=int,
+            help="Gamer owning every row, instead of the file's gamer column")
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="Rows validated and inserted per transaction")
+
+    def handle(self, *args, **options):
+        file_format = options['format']
+        if file_format is None:
+            file_format = os.path.splitext(options['path'])[1].lstrip('.').lower()
+            if file_format not in FORMATS:
+                raise CommandError("Can't tell the file format, pass --format")
+
+        gamer = None
+        if options['gamer'] is not None:
+            gamer = Gamer.objects.filter(pk=options['gamer']).first()
+            if gamer is None:
+                raise CommandError(f"Gamer {options['gamer']} does not exist")
+
+        importer = IMPORTERS[options['kind']](gamer=gamer, chunk_size=options['chunk_size'])
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as rows:
+                report = importer.run(read_rows(rows, file_format))
+        except OSError as ex:
+            raise CommandError(ex)
+
+        for error in report.errors:
+            for column, messages in error['errors'].items():
+                self.stderr.write(f"Row {error['row']}: {column}: {' '.join(messages)}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... and {report.error_count - len(report.errors)} more rows with errors")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} of {report.rows} {options['kind']} "
+            f"in {report.seconds:.2f}s ({report.rows_per_second} rows/s)"))
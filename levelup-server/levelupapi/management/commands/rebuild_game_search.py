@@ -0,0 +1,20 @@
+"""Command for rebuilding the full text index of games"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from levelupapi import search
+
+
+class Command(BaseCommand):
+    help = "Reindex every game's title and description for search"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help="Database to reindex")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            raise CommandError("Game search is only indexed on SQLite")
+
+        indexed = search.rebuild(using)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} games for search"))
@@ -0,0 +1,11 @@
+"""Command for repairing drift in the attendee count of events"""
+from django.core.management.base import BaseCommand
+from levelupapi.models import Event
+
+
+class Command(BaseCommand):
+    help = "Recompute every event's attendee count from its signups"
+
+    def handle(self, *args, **options):
+        updated = Event.objects.recount_attendees()
+        self.stdout.write(self.style.SUCCESS(f"Recounted attendees of {updated} events"))
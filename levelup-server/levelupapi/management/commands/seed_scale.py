@@ -0,0 +1,28 @@
+"""Command for filling the database with synthetic data"""
+import time
+from django.core.management.base import BaseCommand
+from levelupapi.seeding import seed
+
+
+class Command(BaseCommand):
+    help = "Bulk insert synthetic gamers, games, events and signups for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gamers', type=int, default=1000)
+        parser.add_argument('--games', type=int, default=200)
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--signups-per-event', type=int, default=4)
+        parser.add_argument(
+            '--password', default='levelup', help="Password of every seeded gamer")
+        parser.add_argument(
+            '--seed', type=int, default=0, help="Random seed, for reproducible data")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = seed(
+            options['gamers'], options['games'], options['events'],
+            options['signups_per_event'], password=options['password'], seed=options['seed'])
+
+        counts = ", ".join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts} in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,81 @@
+"""Middleware for the levelup API"""
+import random
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from levelupapi import instrumentation, queryinspector
+
+
+def route_name(view_func, method):
+    """Name of the code serving a request, e.g. `Events.list`"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return view_func.__name__
+
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+
+
+class InstrumentationMiddleware:
+    """Time each request, its queries and its serializers
+
+    Adds a `Server-Timing` header to every response and feeds the
+    histograms served on `/metrics`. Only loaded when
+    `LEVELUP_METRICS_ENABLED` is set, otherwise Django drops it from the
+    middleware chain at startup and nothing is measured.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LEVELUP_METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+        # Connections opened from now on are watched as they're created
+        for connection in connections.all():
+            instrumentation.watch_queries(connection)
+
+    def __call__(self, request):
+        metrics = instrumentation.RequestMetrics()
+        reset = instrumentation.current.set(metrics)
+        request.route = 'unmatched'
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.current.reset(reset)
+
+        if request.route != 'metrics':
+            instrumentation.observe(request.route, metrics)
+        response['Server-Timing'] = instrumentation.server_timing(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.route = route_name(view_func, request.method)
+
+
+class QueryInspectorMiddleware:
+    """Log N+1 patterns and slow queries of a sample of requests
+
+    `LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE` of requests, from 0 to 1, are
+    inspected, and what's found goes to the `levelupapi.queries` log as
+    JSON. At 0 Django drops the middleware at startup.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE:
+            return self.get_response(request)
+
+        with queryinspector.inspecting('unmatched') as inspection:
+            response = self.get_response(request)
+
+        queryinspector.log_findings(inspection)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        inspection = queryinspector.current.get()
+        if inspection is not None:
+            inspection.route = route_name(view_func, request.method)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:00
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_signups(apps, schema_editor):
+    """Keep only the first signup of each gamer for each event"""
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+    keep = EventGamer.objects.values('event', 'gamer').annotate(first=Min('id')).values('first')
+    EventGamer.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0003_event_day_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_signups, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='eventgamer',
+            index=models.Index(fields=['gamer', 'event'], name='eventgamer_gamer_event_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventgamer',
+            constraint=models.UniqueConstraint(fields=('event', 'gamer'), name='eventgamer_event_gamer_uniq'),
+        ),
+    ]
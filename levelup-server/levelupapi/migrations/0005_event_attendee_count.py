@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_attendees(apps, schema_editor):
+    """Fill in the attendee count of existing events"""
+    Event = apps.get_model('levelupapi', 'Event')
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+    signups = EventGamer.objects.filter(event=OuterRef('pk')).values(
+        'event').annotate(total=Count('id')).values('total')
+    Event.objects.update(attendee_count=Coalesce(Subquery(signups), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0004_eventgamer_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendee_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_attendees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['game', 'event_day', 'event_time', 'id'], name='event_game_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['gamer', 'event_day', 'event_time', 'id'], name='event_gamer_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['location', 'event_day', 'event_time', 'id'], name='event_location_day_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# FTS5 index over game titles and descriptions. It stores no text of its
+# own, reading it from `levelupapi_game`, and the triggers below keep it
+# in step. Prefix indexes make 2 and 3 letter prefix searches as cheap
+# as whole words.
+#
+# Django rebuilds a SQLite table for many schema changes (AlterField,
+# RemoveField, ...), dropping its triggers. A migration that rebuilds
+# levelupapi_game has to create these triggers again, which the
+# `levelupapi.E001` system check reminds of.
+CREATE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE levelupapi_game_search USING fts5(
+        title, description,
+        content='levelupapi_game', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_search_insert AFTER INSERT ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_search_delete AFTER DELETE ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_search(levelupapi_game_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_search_update AFTER UPDATE OF title, description ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_search(levelupapi_game_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO levelupapi_game_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO levelupapi_game_search(levelupapi_game_search) VALUES ('rebuild')",
+]
+
+DROP_SEARCH = [
+    "DROP TRIGGER IF EXISTS levelupapi_game_search_update",
+    "DROP TRIGGER IF EXISTS levelupapi_game_search_delete",
+    "DROP TRIGGER IF EXISTS levelupapi_game_search_insert",
+    "DROP TABLE IF EXISTS levelupapi_game_search",
+]
+
+
+def run(statements):
+    """Migration step running SQL on SQLite, and nothing elsewhere"""
+    def step(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return step
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0007_event_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SEARCH), run(DROP_SEARCH)),
+    ]
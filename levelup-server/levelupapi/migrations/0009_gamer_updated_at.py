@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0008_game_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,4 +1,26 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class EventQuerySet(models.QuerySet):
+
+    def recount_attendees(self):
+        """Set `attendee_count` from the signups of each event
+
+        Only events whose count was off are written, and marked updated.
+
+        Returns:
+            int -- Number of events whose count changed
+        """
+        from .eventgamer import EventGamer
+
+        signups = EventGamer.objects.filter(event=OuterRef('pk')).values(
+            'event').annotate(total=Count('id')).values('total')
+        attendees = Coalesce(Subquery(signups), 0)
+        return self.exclude(attendee_count=attendees).update(
+            attendee_count=attendees, updated_at=timezone.now())
 
 
 class Event(models.Model):
@@ -8,6 +30,27 @@ class Event(models.Model):
     game = models.ForeignKey("Game", on_delete=models.CASCADE)
     location = models.CharField(max_length=75)
     gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
+    # Number of signups, kept up to date as gamers join and leave so
+    # capacity can be checked without counting
+    attendee_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Calendar order, used by keyset pagination of events
+            models.Index(fields=['event_day', 'event_time', 'id'], name='event_day_time_id_idx'),
+            # Calendar order within one game, organizer or location, used
+            # by the filters on the list of events
+            models.Index(fields=['game', 'event_day', 'event_time', 'id'], name='event_game_day_idx'),
+            models.Index(fields=['gamer', 'event_day', 'event_time', 'id'], name='event_gamer_day_idx'),
+            models.Index(fields=['location', 'event_day', 'event_time', 'id'],
+                         name='event_location_day_idx'),
+            # Latest change, used to answer conditional requests
+            models.Index(fields=['updated_at'], name='event_updated_at_idx'),
+        ]
+
     @property
     def joined(self):
         return self.__joined
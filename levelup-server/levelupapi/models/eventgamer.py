@@ -2,4 +2,14 @@ from django.db import models
 
 class EventGamer(models.Model):
     event = models.ForeignKey("Event", on_delete=models.CASCADE)
-    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
\ No newline at end of file
+    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            # A gamer can only sign up for an event once
+            models.UniqueConstraint(fields=['event', 'gamer'], name='eventgamer_event_gamer_uniq'),
+        ]
+        indexes = [
+            # Events a gamer joined, used by the profile
+            models.Index(fields=['gamer', 'event'], name='eventgamer_gamer_event_idx'),
+        ]
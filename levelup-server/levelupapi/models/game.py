@@ -1,5 +1,8 @@
 from django.db import models
 
+# On SQLite, triggers keep the `levelupapi_game_search` full text index
+# in step with this table. A migration that makes Django rebuild the
+# table drops them, and has to create them again, see levelupapi/search.py.
 class Game(models.Model):
 
     title = models.CharField(max_length=75)
@@ -7,4 +10,10 @@ class Game(models.Model):
     number_of_players = models.IntegerField()
     gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
     description = models.CharField(max_length=250)
-    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Latest change, used to answer conditional requests
+            models.Index(fields=['updated_at'], name='game_updated_at_idx'),
+        ]
@@ -6,4 +6,6 @@ from django.contrib.auth.models import User
 class Gamer(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    bio = models.CharField(max_length=50)
\ No newline at end of file
+    bio = models.CharField(max_length=50)
+    # Also moved by changes to the user, which has no such field
+    updated_at = models.DateTimeField(auto_now=True)
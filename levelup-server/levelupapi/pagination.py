@@ -0,0 +1,156 @@
+"""Keyset pagination for the list endpoints"""
+import base64
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique ordering
+
+    Clients opt in with `?pagination=cursor` and then follow the `next`
+    link. Each page is fetched with `WHERE (ordering) > (last row seen)`
+    instead of an OFFSET, so page N costs the same as page 1, and no
+    COUNT query is run.
+    """
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    mode = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def requested(cls, request):
+        """Whether the client asked for this pagination mode"""
+        return request.query_params.get(cls.mode_query_param, None) == cls.mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Fetch the page of rows following the request's cursor
+
+        Returns:
+            list -- Model instances on this page
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # One extra row tells us whether there is a next page
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = self.position_of(page[-1])
+
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def get_page_size(self, request):
+        """Page size from the `limit` query param, capped at `max_page_size`"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        """URL of the next page, or None on the last page"""
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_previous_link(self):
+        return None
+
+    def after(self, position):
+        """Filter for rows sorting after `position` in `ordering`
+
+        Spelled `a >= x AND (a > x OR (a = x AND (b > y OR ...)))`, so
+        the leading column bounds a range scan on the matching index.
+        """
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, position))):
+            greater = Q(**{f'{field}__gt': value})
+            if condition is None:
+                condition = greater
+            else:
+                condition = greater | (Q(**{field: value}) & condition)
+
+        if len(self.ordering) > 1:
+            condition = Q(**{f'{self.ordering[0]}__gte': position[0]}) & condition
+        return condition
+
+    def position_of(self, instance):
+        """Ordering values of a row, in a JSON friendly form"""
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position):
+        """Opaque cursor string for a position"""
+        data = json.dumps(position, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, request):
+        """Position encoded in the request's cursor, if there is one"""
+        encoded = request.query_params.get(self.cursor_query_param, None)
+        if encoded is None:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Positions hold ids and ISO dates and times, anything else (a
+        # float, or an int too large for the database) can't be one
+        low, high = connection.ops.integer_field_range('BigIntegerField')
+        for value in position:
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise NotFound(self.invalid_cursor_message)
+            if isinstance(value, int) and not low <= value <= high:
+                raise NotFound(self.invalid_cursor_message)
+        return position
+
+
+class GamePagination(KeysetPagination):
+    """Keyset pagination for games, in the order they were added"""
+    ordering = ('id',)
+
+
+class EventPagination(KeysetPagination):
+    """Keyset pagination for events, in calendar order
+
+    Backed by the (event_day, event_time, id) index on events.
+    """
+    ordering = ('event_day', 'event_time', 'id')
@@ -0,0 +1,33 @@
+"""Parsers for bulk imports sent as NDJSON or CSV"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from levelupapi.importer import read_rows
+
+
+class RowsParser(BaseParser):
+    """Parse a request body into a list of rows with `read_rows`"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            text = stream.read().decode(encoding)
+        except UnicodeDecodeError as ex:
+            raise ParseError(f'Request body is not {encoding} text - {ex}')
+
+        return list(read_rows(text.splitlines(), self.format))
+
+
+class NDJSONParser(RowsParser):
+    """One JSON object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class CSVParser(RowsParser):
+    """A header line naming the columns, then one line per row"""
+    media_type = 'text/csv'
+    format = 'csv'
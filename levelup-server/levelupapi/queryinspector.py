@@ -0,0 +1,164 @@
+"""Query inspector flagging N+1 patterns and slow statements
+
+Every query run while an `Inspection` is active is fingerprinted, so
+statements that differ only in their values count as the same one.
+The same statement run many times in one request is the signature of
+an N+1: a query per row instead of one for all of them.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from levelupapi.instrumentation import rendering
+
+logger = logging.getLogger('levelupapi.queries')
+
+# Inspection of the request being served, None when not inspecting
+current = ContextVar('levelup_query_inspection', default=None)
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDERS = re.compile(r'%s|\?')
+LISTS = re.compile(r'\((?:\s*\?\s*,)*\s*\?\s*\)')
+SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL with its values taken out, e.g. `... WHERE "id" = ?`
+
+    `IN` lists of any length become `(...)`, so prefetches of different
+    sizes share a fingerprint.
+    """
+    sql = STRINGS.sub('?', sql)
+    sql = NUMBERS.sub('?', sql)
+    sql = PLACEHOLDERS.sub('?', sql)
+    sql = LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class Inspection:
+    """Queries run during one request, or one block of a test"""
+
+    def __init__(self, route=None):
+        self.route = route
+        self.counts = Counter()
+        # Fingerprint -> serializer rendering when it was first run
+        self.serializers = {}
+        self.queries = []
+        self.slow = []
+
+    @property
+    def total(self):
+        return len(self.queries)
+
+    def record(self, sql, seconds):
+        statement = fingerprint(sql)
+        self.counts[statement] += 1
+        self.serializers.setdefault(statement, rendering.get())
+        self.queries.append(sql)
+
+        if seconds * 1000 >= settings.LEVELUP_SLOW_QUERY_MS:
+            self.slow.append({
+                'sql': statement,
+                'ms': round(seconds * 1000, 2),
+                'serializer': rendering.get(),
+            })
+
+    def repeated(self, threshold=None):
+        """Statements run more than `threshold` times, most repeated first
+
+        Returns:
+            list -- (fingerprint, times run, serializer) tuples
+        """
+        if threshold is None:
+            threshold = settings.LEVELUP_N_PLUS_ONE_THRESHOLD
+        return [
+            (statement, count, self.serializers[statement])
+            for statement, count in self.counts.most_common()
+            if count > threshold
+        ]
+
+
+def inspect_query(execute, sql, params, many, context):
+    """Database execute wrapper recording queries in the active inspection"""
+    inspection = current.get()
+    if inspection is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        inspection.record(sql, time.perf_counter() - started)
+
+
+def watch_queries(connection):
+    """Inspect every query run on a database connection"""
+    if inspect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(inspect_query)
+
+
+@contextmanager
+def inspecting(route=None):
+    """Inspect the queries run inside the block
+
+    Yields:
+        Inspection -- Filled in as queries run
+    """
+    for connection in connections.all():
+        watch_queries(connection)
+
+    inspection = Inspection(route)
+    reset = current.set(inspection)
+    try:
+        yield inspection
+    finally:
+        current.reset(reset)
+
+
+def log_findings(inspection):
+    """Write N+1 patterns and slow statements to the structured log"""
+    for statement, count, serializer in inspection.repeated():
+        logger.warning(json.dumps({
+            'event': 'n_plus_one',
+            'route': inspection.route,
+            'serializer': serializer,
+            'count': count,
+            'sql': statement,
+        }))
+
+    for slow in inspection.slow:
+        logger.warning(json.dumps({
+            'event': 'slow_query',
+            'route': inspection.route,
+            **slow,
+        }))
+
+
+class QueryInspectionMixin:
+    """TestCase mixin with query budgets for endpoints"""
+
+    @contextmanager
+    def assertMaxQueries(self, limit, threshold=None):  # pylint: disable=invalid-name
+        """Fail if the block runs more than `limit` queries, or an N+1
+
+        An N+1 is any statement run more than `threshold` times, by
+        default `LEVELUP_N_PLUS_ONE_THRESHOLD`.
+        """
+        with inspecting() as inspection:
+            yield inspection
+
+        queries = '\n'.join(f'  {sql}' for sql in inspection.queries)
+        self.assertLessEqual(
+            inspection.total, limit,
+            f'{inspection.total} queries run, at most {limit} expected:\n{queries}')
+
+        repeated = inspection.repeated(threshold)
+        self.assertFalse(repeated, 'N+1 queries:\n' + '\n'.join(
+            f'  {count} times, rendering {serializer}: {statement}'
+            for statement, count, serializer in repeated))
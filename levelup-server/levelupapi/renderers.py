@@ -0,0 +1,109 @@
+"""Renderers for exports streamed one row at a time"""
+import csv
+import itertools
+import json
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingRenderer(BaseRenderer):
+    """Renderer that can also write rows as they are produced
+
+    Views stream rows with `stream`. `render` is still there for the
+    responses DRF renders itself, like errors.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+    def stream(self, rows):
+        """Yield the rendered text of each row
+
+        Method arguments:
+          rows -- Iterable of dicts, all with the same keys
+        """
+        raise NotImplementedError('.stream() must be implemented.')
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """One JSON object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, rows):
+        for row in rows:
+            yield json.dumps(row, cls=JSONEncoder, separators=(',', ':')) + '\n'
+
+
+class Echo:
+    """File like object handing back whatever is written to it"""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    """A header line with the keys of the first row, then one line per row
+
+    Lists are written as one cell with their items separated by `;`.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        header = None
+        for row in rows:
+            if header is None:
+                header = list(row)
+                yield writer.writerow(header)
+            yield writer.writerow([self.cell(row[key]) for key in header])
+
+    def cell(self, value):
+        """CSV friendly version of a value"""
+        if isinstance(value, (list, tuple)):
+            return ';'.join(str(item) for item in value)
+        if isinstance(value, dict):
+            return json.dumps(value, cls=JSONEncoder)
+        return value
+
+
+class FallbackNegotiation(DefaultContentNegotiation):
+    """Content negotiation answering any `Accept` with the first renderer
+
+    Clients asking for a media type the view can't render get its
+    default format rather than a 406. An unknown `?format=` is still a 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return (renderers[0], renderers[0].media_type)
+
+
+async def stream_async(lines, batch_size):
+    """Async iterator over the lines of a synchronous stream
+
+    Under ASGI, Django reads a synchronous streaming response into a list
+    before sending any of it. This reads `batch_size` lines at a time,
+    on the request's thread, so memory use stays flat there too.
+    """
+    lines = iter(lines)
+    next_batch = sync_to_async(lambda: list(itertools.islice(lines, batch_size)))
+    try:
+        while True:
+            batch = await next_batch()
+            if not batch:
+                return
+            for line in batch:
+                yield line
+    finally:
+        # Close the stream, and its database cursor, on its own thread
+        if hasattr(lines, 'close'):
+            await sync_to_async(lines.close)()
@@ -0,0 +1,42 @@
+"""Database router sending view reads to a read replica"""
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Database the current request reads from, None for the primary. Set by
+# `ReplicaReadMixin` around the views that are safe to serve stale.
+read_database = ContextVar('levelup_read_database', default=None)
+
+
+def recent_write_key(user_id):
+    """Cache key marking that a user wrote to the primary a moment ago"""
+    return f'levelup:recent-write:{user_id}'
+
+
+def remember_write(user_id):
+    """Keep a user's reads on the primary until the replica catches up"""
+    cache.set(recent_write_key(user_id), True, settings.LEVELUP_READ_YOUR_WRITES_SECONDS)
+
+
+def wrote_recently(user_id):
+    """Whether a user's reads should still go to the primary"""
+    return cache.get(recent_write_key(user_id), False)
+
+
+class ReplicaRouter:
+    """Route reads to the database chosen for the request, writes to the primary
+
+    Outside of the replica aware views `read_database` is unset and
+    Django's usual choice of database applies.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
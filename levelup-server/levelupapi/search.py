@@ -0,0 +1,168 @@
+"""Full text search over game titles and descriptions
+
+On SQLite the `levelupapi_game_search` FTS5 table indexes every game's
+title and description, and triggers keep it in step with
+`levelupapi_game`. A search reads the index instead of scanning games,
+so it stays fast however many games there are. Other databases fall
+back to a substring match.
+"""
+import re
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'levelupapi_game_search'
+
+# Triggers on `levelupapi_game` keeping the index in step, created by
+# migration 0008. Django rebuilds SQLite tables for many schema changes,
+# which drops them without a word, see `check_search_triggers`.
+SEARCH_TRIGGERS = (
+    'levelupapi_game_search_insert',
+    'levelupapi_game_search_delete',
+    'levelupapi_game_search_update',
+)
+
+# bm25 weights of the title and description columns. A word in the
+# title says far more about a game than the same word in its description.
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+WORD = re.compile(r'\w+')
+
+
+def match_expression(q):
+    """FTS5 query for games containing every word of `q` as a prefix
+
+    Each word is quoted, so FTS5 operators in what the client typed
+    (`OR`, `NEAR`, `*`, `-`, ...) are searched for rather than obeyed.
+
+    Returns:
+        str -- e.g. `"clu"* "board"*`, or None if `q` has no words
+    """
+    words = WORD.findall(q.lower())
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def candidates_query(queryset, match):
+    """SQL for the newest games in `queryset` matching `match`, with their score
+
+    Returns:
+        tuple -- (sql, params)
+    """
+    sql = (f'SELECT {SEARCH_TABLE}.rowid, bm25({SEARCH_TABLE}, %s, %s) AS score '
+           f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s')
+    params = [TITLE_WEIGHT, DESCRIPTION_WEIGHT, match]
+    if queryset.query.has_filters():
+        # Check each match against the queryset's filters by primary
+        # key, rather than collecting every game the filters allow
+        matching = queryset.filter(pk=RawSQL(f'{SEARCH_TABLE}.rowid', ())).values('pk')
+        filter_sql, filter_params = matching.query.sql_with_params()
+        sql += f' AND EXISTS ({filter_sql})'
+        params.extend(filter_params)
+    sql += f' ORDER BY {SEARCH_TABLE}.rowid DESC LIMIT %s'
+    params.append(settings.LEVELUP_SEARCH_CANDIDATES)
+    return sql, params
+
+
+def ranked_ids_query(queryset, expression, limit):
+    """SQL for the ids of the best `limit` games matching `expression`
+
+    Games with every word in their title come first, then the games
+    matching elsewhere, each ranked by bm25. bm25 scores every row it
+    ranks, so each of the two only ranks its newest
+    `LEVELUP_SEARCH_CANDIDATES` matches. A word common enough to match
+    more games than that costs no more than a rarer one, but its older
+    matches are left out.
+
+    Returns:
+        tuple -- (sql, params)
+    """
+    title_match = f'{{title}} : ({expression})'
+    other_match = f'({expression}) NOT ({title_match})'
+
+    tiers = []
+    params = []
+    for tier, match in enumerate((title_match, other_match)):
+        sql, tier_params = candidates_query(queryset, match)
+        tiers.append(f'SELECT rowid, {tier} AS tier, score FROM ({sql})')
+        params.extend(tier_params)
+
+    sql = f'SELECT rowid FROM ({" UNION ALL ".join(tiers)}) ORDER BY tier, score, rowid LIMIT %s'
+    return sql, params + [limit]
+
+
+def search_games(queryset, q, limit):
+    """Games in `queryset` matching `q`, best match first
+
+    Returns:
+        list -- At most `limit` games
+    """
+    expression = match_expression(q)
+    if expression is None:
+        return []
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'sqlite':
+        for word in WORD.findall(q):
+            queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        return list(queryset.order_by('title', 'id')[:limit])
+
+    sql, params = ranked_ids_query(queryset, expression, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ranked = [row[0] for row in cursor.fetchall()]
+
+    games = queryset.in_bulk(ranked)
+    return [games[pk] for pk in ranked if pk in games]
+
+
+def rebuild(using='default'):
+    """Reindex every game from scratch
+
+    Returns:
+        int -- Number of games indexed
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def missing_triggers(using='default'):
+    """Names of the search triggers missing from a SQLite database
+
+    Returns:
+        list -- Empty when the index is kept in step with games
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'levelupapi_game'")
+        present = {row[0] for row in cursor.fetchall()}
+    return [name for name in SEARCH_TRIGGERS if name not in present]
+
+
+@register(Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """System check that the search index is still kept in step with games
+
+    Runs for `manage.py migrate` and `manage.py check --database default`.
+    """
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor != 'sqlite' or SEARCH_TABLE not in connection.introspection.table_names():
+            continue
+        missing = missing_triggers(alias)
+        if missing:
+            errors.append(Error(
+                f"Game search triggers are missing: {', '.join(missing)}",
+                hint="A migration rebuilt levelupapi_game. Recreate the triggers "
+                     "from migration 0008_game_search in a new migration, then run "
+                     "`manage.py rebuild_game_search`.",
+                id='levelupapi.E001'))
+    return errors
@@ -0,0 +1,130 @@
+"""Synthetic data at scale, for load testing"""
+import random
+from datetime import date, time, timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+
+GAME_TYPES = ("Board game", "Role-playing game", "MMO game", "Card game", "Party game")
+LOCATIONS = ("Basement", "Library", "Game store", "Community center", "Online")
+# Game titles and descriptions are drawn from these, so searches for a
+# word match a share of the games rather than all or none of them
+TITLE_WORDS = (
+    "Dungeon", "Dragon", "Castle", "Galaxy", "Pirate", "Empire", "Forest", "Kingdom",
+    "Mystery", "Railway", "Harbor", "Zombie", "Wizard", "Robot", "Jungle", "Desert",
+    "Island", "Tower", "Shadow", "Legend", "Frontier", "Colony", "Orchard", "Volcano",
+)
+DESCRIPTION_WORDS = (
+    "cooperative", "competitive", "strategy", "bluffing", "trading", "racing",
+    "deduction", "drafting", "exploration", "puzzle", "auction", "dice",
+    "cards", "tiles", "miniatures", "campaign", "family", "party", "solo", "economic",
+)
+
+
+def new_ids(model, after):
+    """Ids of the rows inserted since `after` was the largest, in order"""
+    return list(model.objects.filter(pk__gt=after or 0).order_by('pk').values_list('pk', flat=True))
+
+
+def last_id(model):
+    """Largest id of a model, or 0"""
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def batches(items, size):
+    """Consecutive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def seed(gamers, games, events, signups_per_event, password='levelup', seed=0, batch_size=1000):
+    """Bulk insert a synthetic dataset alongside whatever is there
+
+    Every gamer gets a user, named `gamer<user id>`, with the same
+    password and an auth token. Events are spread over six months either
+    side of today, and each gets up to `signups_per_event` attendees, as
+    many as its game seats. The same arguments and seed always produce
+    the same data on an empty database.
+
+    Returns:
+        dict -- Number of rows created for each model
+    """
+    rng = random.Random(seed)
+    # Titles and descriptions come from their own generator, so how
+    # much text is drawn doesn't change the rest of the data
+    words = random.Random(f"{seed}-words")
+    created = {}
+
+    with transaction.atomic():
+        # Hashed once, hashing per user would dominate the run
+        hashed = make_password(password)
+        first_user = last_id(User) + 1
+        after = last_id(User)
+        for batch in batches(range(first_user, first_user + gamers), batch_size):
+            User.objects.bulk_create([
+                User(username=f"gamer{n}", password=hashed, email=f"gamer{n}@levelup.test",
+                     first_name="Gamer", last_name=str(n))
+                for n in batch
+            ])
+        user_ids = new_ids(User, after)
+
+        after = last_id(Gamer)
+        for batch in batches(user_ids, batch_size):
+            Gamer.objects.bulk_create([Gamer(user_id=user_id, bio="Seeded gamer") for user_id in batch])
+            Token.objects.bulk_create([
+                Token(key=Token.generate_key(), user_id=user_id) for user_id in batch
+            ])
+        gamer_ids = new_ids(Gamer, after)
+        created['gamers'] = len(gamer_ids)
+        # Without new gamers, games and events go to the existing ones
+        gamer_ids = gamer_ids or list(Gamer.objects.values_list('pk', flat=True))
+
+        game_type_ids = list(GameType.objects.values_list('pk', flat=True))
+        if not game_type_ids:
+            GameType.objects.bulk_create([GameType(label=label) for label in GAME_TYPES])
+            game_type_ids = list(GameType.objects.values_list('pk', flat=True))
+
+        after = last_id(Game)
+        seats = []
+        for batch in batches(range(games), batch_size):
+            batch_seats = [rng.randint(2, 10) for _ in batch]
+            Game.objects.bulk_create([
+                Game(title=f"{' '.join(words.sample(TITLE_WORDS, 2))} {after + n + 1}",
+                     game_type_id=rng.choice(game_type_ids),
+                     number_of_players=players, gamer_id=rng.choice(gamer_ids),
+                     description=f"A {' '.join(words.sample(DESCRIPTION_WORDS, 3))} game")
+                for n, players in zip(batch, batch_seats)
+            ])
+            seats.extend(batch_seats)
+        game_ids = new_ids(Game, after)
+        created['games'] = len(game_ids)
+
+        today = date.today()
+        created['events'] = 0
+        created['signups'] = 0
+        for batch in batches(range(events), batch_size):
+            after = last_id(Event)
+            planned = []
+            for _ in batch:
+                game = rng.randrange(len(game_ids))
+                attendees = rng.sample(gamer_ids, min(signups_per_event, seats[game], len(gamer_ids)))
+                planned.append((Event(
+                    event_day=today + timedelta(days=rng.randint(-180, 180)),
+                    event_time=time(rng.randint(9, 21), rng.choice((0, 15, 30, 45))),
+                    game_id=game_ids[game], location=rng.choice(LOCATIONS),
+                    gamer_id=rng.choice(gamer_ids), attendee_count=len(attendees)), attendees))
+
+            Event.objects.bulk_create([event for event, _ in planned])
+            event_ids = new_ids(Event, after)
+            EventGamer.objects.bulk_create([
+                EventGamer(event_id=event_id, gamer_id=gamer_id)
+                for event_id, (_, attendees) in zip(event_ids, planned)
+                for gamer_id in attendees
+            ])
+            created['events'] += len(event_ids)
+            created['signups'] += sum(len(attendees) for _, attendees in planned)
+
+    return created
@@ -0,0 +1,105 @@
+"""Signal handlers tuning connections and keeping cached data in step with the database"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from levelupapi.authentication import forget_token
+from levelupapi import instrumentation, queryinspector
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupapi.sqlite import configure_connection
+from levelupapi.views.gametype import bump_gametypes_version
+from levelupapi.views.profile import forget_profiles
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    """Apply the SQLite PRAGMAs to each new database connection"""
+    configure_connection(connection)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Time and inspect the queries of each new connection when asked to"""
+    if settings.LEVELUP_METRICS_ENABLED:
+        instrumentation.watch_queries(connection)
+    if settings.LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE:
+        queryinspector.watch_queries(connection)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """A deleted token must stop authenticating right away"""
+    forget_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Gamer)
+@receiver(post_delete, sender=Gamer)
+def forget_tokens_of_user(sender, instance, created=False, **kwargs):
+    """Cached tokens hold the user and gamer, so drop them on changes"""
+    if created:
+        # Nothing has been cached for a new account yet
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        forget_token(key)
+
+
+@receiver(post_save, sender=User)
+def touch_gamer(sender, instance, created=False, update_fields=None, **kwargs):
+    """Games and events show their gamer's user, so its changes move the gamer's `updated_at`"""
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        # Logging in changes nothing that is shown
+        return
+    Gamer.objects.filter(user=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=GameType)
+@receiver(post_delete, sender=GameType)
+def gametypes_changed(sender, **kwargs):
+    """Any change to a game type invalidates the cached catalog"""
+    bump_gametypes_version()
+
+
+@receiver(post_save, sender=Event)
+@receiver(pre_delete, sender=Event)
+def event_changed(sender, instance, created=False, **kwargs):
+    """Profiles list the events a gamer joined, which new events aren't"""
+    if created:
+        return
+    forget_profiles(EventGamer.objects.filter(
+        event=instance).values_list('gamer_id', flat=True))
+
+
+@receiver(post_delete, sender=EventGamer)
+def seat_given_up(sender, instance, **kwargs):
+    """A deleted signup frees its seat, also when its gamer or user is deleted"""
+    Event.objects.filter(pk=instance.event_id).update(
+        attendee_count=F('attendee_count') - 1, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Game)
+@receiver(pre_delete, sender=Game)
+def game_changed(sender, instance, created=False, **kwargs):
+    """Profiles list the game of each event a gamer joined"""
+    if created:
+        return
+    forget_profiles(EventGamer.objects.filter(
+        event__game=instance).values_list('gamer_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Gamer)
+def gamer_changed(sender, instance, created=False, **kwargs):
+    """Profiles show the gamer's own details"""
+    if created:
+        return
+    if sender is User:
+        forget_profiles(Gamer.objects.filter(
+            user=instance).values_list('id', flat=True))
+    else:
+        forget_profiles([instance.pk])
@@ -0,0 +1,55 @@
+"""Module for tuning every SQLite connection as it is opened"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Keyword values each PRAGMA accepts. PRAGMAs can't take query
+# parameters, so anything else is refused rather than pasted into SQL.
+PRAGMA_CHOICES = {
+    'journal_mode': ('delete', 'truncate', 'persist', 'memory', 'wal', 'off'),
+    'synchronous': ('off', 'normal', 'full', 'extra'),
+    'temp_store': ('default', 'file', 'memory'),
+}
+
+# PRAGMAs that take a whole number
+INTEGER_PRAGMAS = ('busy_timeout', 'cache_size', 'mmap_size')
+
+
+def pragma_statement(name, value):
+    """SQL setting one PRAGMA, after checking the name and value
+
+    Returns:
+        str -- e.g. `PRAGMA journal_mode = wal`
+    """
+    if name in PRAGMA_CHOICES:
+        value = str(value).lower()
+        if value not in PRAGMA_CHOICES[name]:
+            raise ImproperlyConfigured(
+                f'LEVELUP_SQLITE_PRAGMAS: {name} must be one of {", ".join(PRAGMA_CHOICES[name])}')
+    elif name in INTEGER_PRAGMAS:
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ImproperlyConfigured(f'LEVELUP_SQLITE_PRAGMAS: {name} must be a number')
+    else:
+        raise ImproperlyConfigured(f'LEVELUP_SQLITE_PRAGMAS: unknown PRAGMA {name}')
+
+    return f'PRAGMA {name} = {value}'
+
+
+def configure_connection(connection):
+    """Apply `LEVELUP_SQLITE_PRAGMAS` to a freshly opened SQLite connection
+
+    busy_timeout goes first so that switching to WAL, which needs a
+    moment of exclusive access to the file, waits for other connections.
+    In-memory databases, like the test database, quietly stay in
+    `memory` journal mode.
+    """
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = dict(getattr(settings, 'LEVELUP_SQLITE_PRAGMAS', {}))
+    ordered = sorted(pragmas.items(), key=lambda pragma: pragma[0] != 'busy_timeout')
+
+    with connection.cursor() as cursor:
+        for name, value in ordered:
+            cursor.execute(pragma_statement(name, value))
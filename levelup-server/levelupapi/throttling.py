@@ -0,0 +1,117 @@
+"""Token bucket rate limiting, for viewsets and the auth views"""
+import functools
+import hashlib
+import json
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.throttling import BaseThrottle
+
+# Seconds in each period a rate can be given in, e.g. `10/minute`
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """Bucket size and refill period of a rate like `10/minute`
+
+    Returns:
+        tuple -- (requests, seconds)
+    """
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period[0]]
+
+
+def bucket_key(scope, ident):
+    """Cache key of a bucket, hashed as idents can be any username"""
+    digest = hashlib.md5(str(ident).lower().encode()).hexdigest()
+    return f'levelup:throttle:{scope}:{digest}'
+
+
+def take_token(scope, ident):
+    """Take a token from the `scope` bucket of `ident`
+
+    Each bucket holds up to `requests` tokens and refills evenly over
+    the rate's period, so short bursts are allowed but the average can't
+    exceed the rate. Buckets live in the cache, which is shared between
+    workers when it is Redis. Reads and writes aren't atomic, so racing
+    requests may occasionally both get the last token.
+
+    Returns:
+        float -- 0 if a token was taken, else seconds until one is free
+    """
+    requests, seconds = parse_rate(settings.LEVELUP_THROTTLE_RATES[scope])
+    key = bucket_key(scope, ident)
+    now = time.time()
+
+    tokens, updated = cache.get(key, (requests, now))
+    tokens = min(requests, tokens + (now - updated) * requests / seconds)
+
+    if tokens < 1:
+        cache.set(key, (tokens, now), seconds)
+        return (1 - tokens) * seconds / requests
+
+    cache.set(key, (tokens - 1, now), seconds)
+    return 0
+
+
+class GamerRateThrottle(BaseThrottle):
+    """Throttle each gamer, or each IP address before they log in
+
+    Uses the `gamer` rate in `LEVELUP_THROTTLE_RATES`.
+    """
+    scope = 'gamer'
+
+    def allow_request(self, request, view):
+        if not settings.LEVELUP_THROTTLE_ENABLED:
+            return True
+
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+
+        self.wait_seconds = take_token(self.scope, ident)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+def throttled(scope, by_username=False):
+    """Throttle a function view by IP address, and optionally by username
+
+    The `scope` rate applies to each IP address, and `<scope>_username`
+    to each username in the JSON body. Requests over either rate get a
+    429 before the view runs, so they never reach password hashing.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def throttled_view(request, *args, **kwargs):
+            if not settings.LEVELUP_THROTTLE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            wait = take_token(scope, BaseThrottle().get_ident(request))
+
+            username = None
+            if by_username and request.method == 'POST':
+                try:
+                    username = json.loads(request.body.decode()).get('username', None)
+                except (ValueError, AttributeError):
+                    username = None
+            if not wait and username is not None:
+                wait = take_token(f'{scope}_username', username)
+
+            if wait:
+                response = HttpResponse(
+                    json.dumps({"detail": "Too many attempts, try again later."}),
+                    content_type='application/json',
+                    status=status.HTTP_429_TOO_MANY_REQUESTS)
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+
+            return view(request, *args, **kwargs)
+        return throttled_view
+    return decorator
@@ -1,5 +1,7 @@
 from .auth import login_user
 from .auth import register_user
+from .auth import logout_user
+from .metrics import metrics
 from .gametype import GameTypes
 from .game import Games
 from .event import Events
@@ -0,0 +1,71 @@
+"""Module for serving read requests from a thread pool under ASGI"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+_read_executor = None
+
+
+def read_executor():
+    """Thread pool shared by every read request, created on first use"""
+    global _read_executor  # pylint: disable=global-statement
+
+    if _read_executor is None:
+        _read_executor = ThreadPoolExecutor(
+            max_workers=settings.LEVELUP_ASYNC_READ_THREADS,
+            thread_name_prefix='levelup-read')
+
+    return _read_executor
+
+
+def run_read(view, request, *args, **kwargs):
+    """Run a view on a pool thread, which owns its database connection"""
+    close_old_connections()
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def async_reads(view):
+    """Wrap a synchronous view in an async view for ASGI servers
+
+    Under ASGI, Django runs each request's synchronous code on a thread
+    of its own, so reads already run side by side, but there is no limit
+    on how many do, and each new thread opens a new database connection.
+    The wrapper hands GET, HEAD and OPTIONS requests to the bounded read
+    pool instead. At most `LEVELUP_ASYNC_READ_THREADS` run at once,
+    others wait their turn, and each pool thread keeps its connection
+    for `CONN_MAX_AGE`. Writes run on the request's thread, just as
+    Django would run them.
+    """
+    read = sync_to_async(
+        functools.partial(run_read, view), thread_sensitive=False, executor=read_executor())
+    write = sync_to_async(view)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    # Keeps `cls`, `actions` and `csrf_exempt` that DRF set on the view
+    return functools.update_wrapper(async_view, view)
+
+
+class AsyncReadMixin:
+    """ViewSet mixin serving reads from the thread pool when enabled
+
+    Turned on by `LEVELUP_ASYNC_READS`, which only makes sense when the
+    app is served over ASGI. See `levelup/asgi.py`.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        if settings.LEVELUP_ASYNC_READS:
+            return async_reads(view)
+        return view
@@ -2,12 +2,16 @@ import json
 from django.http import HttpResponse
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework.authtoken.models import Token
 from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import get_authorization_header
 from levelupapi.models import Gamer
+from levelupapi.throttling import throttled
 from rest_framework import status
 
 @csrf_exempt
+@throttled('login', by_username=True)
 def login_user(request):
     '''Handles the authentication of a gamer
 
@@ -27,7 +31,8 @@ def login_user(request):
 
         # If authentication was successful, respond with their token
         if authenticated_user is not None:
-            token = Token.objects.get(user=authenticated_user)
+            # Gamers who logged out get a fresh token
+            token, _ = Token.objects.get_or_create(user=authenticated_user)
             data = json.dumps({"valid": True, "token": token.key})
             return HttpResponse(data, content_type='application/json')
 
@@ -38,6 +43,28 @@ def login_user(request):
 
 
 @csrf_exempt
+def logout_user(request):
+    '''Handles a gamer logging out by revoking their token
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+
+    if request.method == 'POST':
+        # Expecting an `Authorization: Token <key>` header
+        auth = get_authorization_header(request).split()
+
+        if len(auth) == 2 and auth[0].lower() == b'token':
+            # Deleting the token also drops it from the auth cache
+            Token.objects.filter(key=auth[1].decode()).delete()
+
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    return HttpResponse(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@csrf_exempt
+@throttled('register')
 def register_user(request):
     '''Handles the creation of a new gamer for authentication
 
@@ -48,27 +75,26 @@ def register_user(request):
     # Load the JSON string of the request body into a dict
     req_body = json.loads(request.body.decode())
 
-    # Create a new user by invoking the `create_user` helper method
-    # on Django's built-in User model
-    new_user = User.objects.create_user(
-        username=req_body['username'],
-        email=req_body['email'],
-        password=req_body['password'],
-        first_name=req_body['first_name'],
-        last_name=req_body['last_name']
-    )
-
-    # Now save the extra info in the levelupapi_gamer table
-    gamer = Gamer.objects.create(
-        bio=req_body['bio'],
-        user=new_user
-    )
-
-    # Commit the user to the database by saving it
-    gamer.save()
-
-    # Use the REST Framework's token generator on the new user account
-    token = Token.objects.create(user=new_user)
+    # The user, gamer and token are written together or not at all
+    with transaction.atomic():
+        # Create a new user by invoking the `create_user` helper method
+        # on Django's built-in User model
+        new_user = User.objects.create_user(
+            username=req_body['username'],
+            email=req_body['email'],
+            password=req_body['password'],
+            first_name=req_body['first_name'],
+            last_name=req_body['last_name']
+        )
+
+        # Now save the extra info in the levelupapi_gamer table
+        Gamer.objects.create(
+            bio=req_body['bio'],
+            user=new_user
+        )
+
+        # Use the REST Framework's token generator on the new user account
+        token = Token.objects.create(user=new_user)
 
     # Return the token to the client
     data = json.dumps({"token": token.key})
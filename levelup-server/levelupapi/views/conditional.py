@@ -0,0 +1,70 @@
+"""Module for answering conditional GET requests"""
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def conditional(request, fingerprint, last_modified=None):
+    """Check a request's If-None-Match/If-Modified-Since headers
+
+    The ETag is a hash of the request's full path, the requesting gamer
+    and `fingerprint`, which holds whatever cheaply identifies the state
+    of the rows the response is built from (e.g. a count and the latest
+    `updated_at`).
+
+    Method arguments:
+      request -- The full HTTP request object
+      fingerprint -- Tuple of values that change whenever the response does
+      last_modified -- Latest change to the rows in the response, if known.
+        Leave it out for lists: deleting a row doesn't move it, so
+        If-Modified-Since would keep matching a stale list
+
+    Returns:
+        tuple -- (304 response or None, validator headers for a full response)
+    """
+    gamer = getattr(request, 'gamer', None)
+    state = (request.get_full_path(), getattr(gamer, 'pk', None)) + tuple(fingerprint)
+    etag = '"%s"' % hashlib.md5(repr(state).encode()).hexdigest()
+
+    headers = {'ETag': etag}
+    timestamp = None
+    if last_modified is not None:
+        timestamp = int(last_modified.timestamp())
+        headers['Last-Modified'] = http_date(timestamp)
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+
+    return not_modified, headers
+
+
+def page_fingerprint(page, fields=('pk', 'updated_at'), relations=()):
+    """Fingerprint of a page of rows that has already been fetched
+
+    Method arguments:
+      page -- Model instances on the page
+      fields -- Attributes of each row that change whenever its output does
+      relations -- Related objects whose `updated_at` counts as well, when
+        they were loaded with the row, i.e. when they are rendered. Paths
+        through several relations are spelled `game__gamer`
+
+    Returns:
+        tuple -- One tuple of values per row
+    """
+    fingerprint = []
+    for row in page:
+        values = [getattr(row, field) for field in fields]
+        for path in relations:
+            related = row
+            for name in path.split('__'):
+                if not related._meta.get_field(name).is_cached(related):
+                    related = None
+                    break
+                related = getattr(related, name)
+            if related is not None:
+                values.append(related.updated_at)
+        fingerprint.append(tuple(values))
+    return tuple(fingerprint)
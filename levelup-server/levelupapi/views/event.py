@@ -1,17 +1,41 @@
 """View module for handling requests about events"""
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.http import HttpResponseServerError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Prefetch
+from django.http import HttpResponseServerError, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
+from levelupapi.importer import EventImporter
+from levelupapi.instrumentation import TimedListSerializer, TimedSerializerMixin
 from levelupapi.models import Game, Event, Gamer, EventGamer
+from levelupapi.pagination import EventPagination
+from levelupapi.parsers import CSVParser, NDJSONParser
+from levelupapi.renderers import CSVRenderer, FallbackNegotiation, NDJSONRenderer, stream_async
+from levelupapi.views.asyncread import AsyncReadMixin
+from levelupapi.views.conditional import conditional, page_fingerprint
 from levelupapi.views.game import GameSerializer
+from levelupapi.views.gametype import gametypes_version
+from levelupapi.views.profile import forget_profiles
+from levelupapi.views.queryplan import QueryPlanMixin
+from levelupapi.views.replica import ReplicaReadMixin
 
-class Events(ViewSet):
+class Events(AsyncReadMixin, ReplicaReadMixin, QueryPlanMixin, ViewSet):
     """Level up events"""
+    queryset = Event.objects.all()
+    # Events read per query while exporting
+    export_chunk_size = 2000
+
+    def get_serializer_class(self):
+        """Events are rendered, and eager loaded, by EventSerializer"""
+        return EventSerializer
 
     def create(self, request):
         """Handle POST operations for events
@@ -19,7 +43,7 @@ class Events(ViewSet):
         Returns:
             Response -- JSON serialized event instance
         """
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = request.gamer
 
         event = Event()
         event.event_day = request.data["event_day"]
@@ -43,10 +67,21 @@ class Events(ViewSet):
         Returns:
             Response -- JSON serialized game instance
         """
+        # Clients that already have the latest version of the event
+        # get an empty 304 response
+        changes = Event.objects.filter(pk=pk).values_list(
+            'updated_at', 'game__updated_at',
+            'gamer__updated_at', 'game__gamer__updated_at').first()
+        last_modified = max(changes) if changes is not None else None
+        not_modified, headers = conditional(
+            request, (changes, gametypes_version()), last_modified)
+        if not_modified is not None:
+            return not_modified
+
         try:
-            event = Event.objects.get(pk=pk)
+            event = self.get_queryset().get(pk=pk)
             serializer = EventSerializer(event, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(serializer.data, status=status.HTTP_200_OK, headers=headers)
         except Exception as ex:
             return HttpResponseServerError(ex)
 
@@ -57,7 +92,7 @@ class Events(ViewSet):
             Response -- Empty body with 204 status code
         """
 
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = request.gamer
 
         event = Event.objects.get(pk=pk)
         event.event_time = request.data["event_time"]
@@ -66,7 +101,10 @@ class Events(ViewSet):
 
         game = Game.objects.get(pk=request.data["game"])
         event.game = game
-        event.save()
+
+        # Leave the attendee count alone, signups may have changed it
+        # since the event was read
+        event.save(update_fields=['event_time', 'location', 'gamer', 'game', 'updated_at'])
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
@@ -91,95 +129,502 @@ class Events(ViewSet):
     def list(self, request):
         """Handle GET requests to events resource
 
+        Events are listed in calendar order, from today on unless `from`
+        says otherwise. See `filter_events` for the filters.
+
         Returns:
             Response -- JSON serialized list of events
         """
         # Get the current authenticated user
-        gamer = Gamer.objects.get(user=request.auth.user)
-        events = Event.objects.all()
-
-        # Set the `joined` property on every event
-        for event in events:
-            event.joined = None
-
-            try:
-                EventGamer.objects.get(event=event, gamer=gamer)
-                event.joined = True
-            except EventGamer.DoesNotExist:
-                event.joined = False
+        gamer = request.gamer
+        events = self.get_queryset()
 
-        # Support filtering events by game
-        game = self.request.query_params.get('gameId', None)
-        if game is not None:
-            events = events.filter(game__id=type)
+        # Support filtering events, upcoming ones only by default
+        #    http://localhost:8000/events?from=2021-03-01&to=2021-03-07&game_type=1
+        try:
+            events = filter_events(events, request.query_params, gamer)
+        except ValueError as ex:
+            return Response({"reason": str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Let the database compute the `joined` property for every
+        # event as part of the list query, so it survives any further
+        # filtering and costs no extra queries per event
+        joined = Exists(EventGamer.objects.filter(event=OuterRef('pk'), gamer=gamer))
+
+        # Support keyset pagination
+        #    http://localhost:8000/events?pagination=cursor
+        paginator = None
+        if EventPagination.requested(request):
+            # A page is validated by the rows on it, so it costs the
+            # same however many events come before or after it
+            paginator = EventPagination()
+            events = paginator.paginate_queryset(
+                events.annotate(joined=joined), request, view=self)
+            fingerprint = (
+                page_fingerprint(events, ('pk', 'updated_at', 'joined'),
+                                 ('game', 'gamer', 'game__gamer')),
+                paginator.next_position)
+        else:
+            # Signups update the event, so a change to `joined` shows
+            # up in the latest `updated_at`. Deleted events show up in
+            # the count. Organizers and game owners move their own
+            # `updated_at`, changes to their users included.
+            latest = events.aggregate(
+                count=Count('id'),
+                updated_at=Max('updated_at'),
+                game_updated_at=Max('game__updated_at'),
+                gamer_updated_at=Max('gamer__updated_at'),
+                game_gamer_updated_at=Max('game__gamer__updated_at')
+            )
+            fingerprint = tuple(latest.values())
+            events = events.annotate(joined=joined)
+
+        # Clients that polled since the last change to any of the events,
+        # their games or the gamers shown get an empty 304 response
+        not_modified, headers = conditional(request, fingerprint + (gametypes_version(),))
+        if not_modified is not None:
+            return not_modified
 
         serializer = EventSerializer(
             events, many=True, context={'request': request})
-        return Response(serializer.data)
-    
+        if paginator is not None:
+            response = paginator.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
     @action(methods=['post', 'delete'], detail=True)
     def signup(self, request, pk=None):
         """Managing gamers signing up for events"""
 
         # A gamer wants to sign up for an event
         if request.method == "POST":
-            # The pk would be `2` if the URL above was requested
-            event = Event.objects.get(pk=pk)
-
             # Django uses the `Authorization` header to determine
             # which user is making the request to sign up
-            gamer = Gamer.objects.get(user=request.auth.user)
+            gamer = request.gamer
 
             try:
-                # Determine if the user is already signed up
-                registration = EventGamer.objects.get(
-                    event=event, gamer=gamer)
+                with transaction.atomic():
+                    # Take a seat at the event, if it exists and isn't
+                    # full, in a single statement. The pk would be `2`
+                    # if the URL above was requested
+                    seated = Event.objects.filter(
+                        pk=pk, attendee_count__lt=F('game__number_of_players')
+                    ).update(attendee_count=F('attendee_count') + 1,
+                             updated_at=timezone.now())
+
+                    # Insert without looking first. The unique (event, gamer)
+                    # constraint rejects a second signup, even one racing
+                    # this request from another worker, and rolls back
+                    # the seat taken above
+                    if seated:
+                        EventGamer.objects.create(event_id=pk, gamer=gamer)
+            except IntegrityError:
                 return Response(
                     {'message': 'Gamer already signed up this event.'},
                     status=status.HTTP_422_UNPROCESSABLE_ENTITY
                 )
-            except EventGamer.DoesNotExist:
-                # The user is not signed up.
-                registration = EventGamer()
-                registration.event = event
-                registration.gamer = gamer
-                registration.save()
 
+            if seated:
+                forget_profiles([gamer.pk])
                 return Response({}, status=status.HTTP_201_CREATED)
 
-        # User wants to leave a previously joined event
-        elif request.method == "DELETE":
-            # Handle the case if the client specifies a game
-            # that doesn't exist
-            try:
-                event = Event.objects.get(pk=pk)
-            except Event.DoesNotExist:
+            # No seat was taken, work out why
+            if not Event.objects.filter(pk=pk).exists():
                 return Response(
                     {'message': 'Event does not exist.'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            if EventGamer.objects.filter(event_id=pk, gamer=gamer).exists():
+                return Response(
+                    {'message': 'Gamer already signed up this event.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
                 )
 
+            return Response(
+                {'message': 'Event is full.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        # User wants to leave a previously joined event
+        elif request.method == "DELETE":
             # Get the authenticated user
-            gamer = Gamer.objects.get(user=request.auth.user)
+            gamer = request.gamer
 
-            try:
-                # Try to delete the signup
-                registration = EventGamer.objects.get(
-                    event=event, gamer=gamer)
-                registration.delete()
+            # Try to delete the signup without looking first. Deleting
+            # it gives up the seat it held, see `levelupapi.signals`.
+            with transaction.atomic():
+                deleted, _ = EventGamer.objects.filter(
+                    event_id=pk, gamer=gamer).delete()
+
+            if deleted:
+                forget_profiles([gamer.pk])
                 return Response(None, status=status.HTTP_204_NO_CONTENT)
 
-            except EventGamer.DoesNotExist:
+            # Handle the case if the client specifies a game
+            # that doesn't exist
+            if not Event.objects.filter(pk=pk).exists():
                 return Response(
-                    {'message': 'Not currently registered for event.'},
-                    status=status.HTTP_404_NOT_FOUND
+                    {'message': 'Event does not exist.'},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
 
+            return Response(
+                {'message': 'Not currently registered for event.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
         # If the client performs a request with a method of
         # anything other than POST or DELETE, tell client that
         # the method is not supported
         return Response({}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @action(methods=['post'], detail=True, url_path='signups', url_name='gamer-signups')
+    def gamer_signups(self, request, pk=None):
+        """Organizer signing many gamers up for their event at once
+
+        Request body:
+            {"gamers": [1, 2, 3]}
+
+        Returns:
+            Response -- Signup status for every requested gamer
+        """
+        gamer_ids = requested_ids(request, "gamers")
+        if gamer_ids is None:
+            return Response(
+                {'message': '`gamers` must be a list of gamer ids.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        gamer = request.gamer
+
+        try:
+            event = Event.objects.select_related('game').get(pk=pk)
+        except Event.DoesNotExist:
+            return Response(
+                {'message': 'Event does not exist.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if event.gamer_id != gamer.id:
+            return Response(
+                {'message': 'Only the organizer can sign other gamers up.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        # Find which gamers exist and which are already signed up
+        # in one query
+        known = {
+            pk: (joined, None)
+            for pk, joined in Gamer.objects.filter(pk__in=gamer_ids).annotate(
+                joined=Exists(EventGamer.objects.filter(
+                    event=event, gamer=OuterRef('pk')))
+            ).values_list('id', 'joined')
+        }
+
+        seats = event.game.number_of_players - event.attendee_count
+        results = signup_results(gamer_ids, known, "gamer", seats)
+
+        try:
+            with transaction.atomic():
+                EventGamer.objects.bulk_create([
+                    EventGamer(event=event, gamer_id=result["gamer"])
+                    for result in results if result["status"] == "signed_up"
+                ], ignore_conflicts=True)
+                seat_signups(Event.objects.filter(pk=event.pk))
+        except EventFull:
+            return Response(
+                {'message': 'Event filled up, try again.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        forget_profiles([
+            result["gamer"] for result in results if result["status"] == "signed_up"
+        ])
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    @action(methods=['post'], detail=False, url_path='signups', url_name='event-signups')
+    def event_signups(self, request):
+        """Gamer signing up for many events at once
+
+        Request body:
+            {"events": [1, 2, 3]}
+
+        Returns:
+            Response -- Signup status for every requested event
+        """
+        event_ids = requested_ids(request, "events")
+        if event_ids is None:
+            return Response(
+                {'message': '`events` must be a list of event ids.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        gamer = request.gamer
+
+        # Find which events exist and which the gamer already joined
+        # in one query
+        known = {
+            pk: (joined, seats)
+            for pk, joined, seats in Event.objects.filter(pk__in=event_ids).annotate(
+                joined=Exists(EventGamer.objects.filter(
+                    event=OuterRef('pk'), gamer=gamer)),
+                seats=F('game__number_of_players') - F('attendee_count')
+            ).values_list('id', 'joined', 'seats')
+        }
+
+        results = signup_results(event_ids, known, "event")
+        signed_up = [
+            result["event"] for result in results if result["status"] == "signed_up"
+        ]
+
+        try:
+            with transaction.atomic():
+                EventGamer.objects.bulk_create([
+                    EventGamer(event_id=event_id, gamer=gamer)
+                    for event_id in signed_up
+                ], ignore_conflicts=True)
+                seat_signups(Event.objects.filter(pk__in=signed_up))
+        except EventFull:
+            return Response(
+                {'message': 'An event filled up, try again.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        forget_profiles([gamer.pk])
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    @action(methods=['get'], detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer],
+            content_negotiation_class=FallbackNegotiation)
+    def export(self, request):
+        """Handle GET requests for the whole event calendar
+
+        `?format=ndjson` or `Accept: application/x-ndjson`, the default
+        for any other `Accept`, or `?format=csv` or `Accept: text/csv`.
+        Rows are written as they are read, a chunk of events and their
+        attendees at a time, so memory use doesn't grow with the number
+        of events. Under ASGI the rows are streamed asynchronously, as
+        Django would otherwise read them all before sending any.
+
+        Returns:
+            StreamingHttpResponse -- One row per event, in calendar order
+        """
+        events = Event.objects.select_related('game', 'gamer__user').prefetch_related(
+            Prefetch('eventgamer_set',
+                     queryset=EventGamer.objects.select_related('gamer__user').order_by('id'))
+        ).order_by(*EventPagination.ordering)
+
+        # Rows are read after the view returns, so hold on to the
+        # database chosen for this request
+        events = events.using(events.db)
+
+        rows = (export_row(event) for event in events.iterator(chunk_size=self.export_chunk_size))
+        renderer = request.accepted_renderer
+        lines = renderer.stream(rows)
+        if isinstance(request._request, ASGIRequest):
+            lines = stream_async(lines, self.export_chunk_size)
+        response = StreamingHttpResponse(
+            lines, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = f'attachment; filename="events.{renderer.format}"'
+        return response
+
+    @action(methods=['post'], detail=False, url_path='import',
+            parser_classes=[NDJSONParser, CSVParser, JSONParser])
+    def bulk_import(self, request):
+        """Handle POST requests adding many events at once
+
+        The body is NDJSON, CSV or a JSON array of events, all owned by
+        the requesting gamer. Valid rows are imported even when others
+        aren't.
+
+        Returns:
+            Response -- JSON report of the rows imported and the errors
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"reason": "Expected a list of events"}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = EventImporter(gamer=request.gamer).run(request.data)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
+class EventFull(Exception):
+    """Raised to roll back signups that would overfill an event"""
+
+
+def seat_signups(events):
+    """Recount the attendees of events that just had signups added
+
+    Signups are recounted rather than incremented because bulk inserts
+    that ignore conflicts don't report how many rows they wrote.
+
+    Raises:
+        EventFull -- If any of the events is now over capacity
+    """
+    events.recount_attendees()
+    if events.filter(attendee_count__gt=F('game__number_of_players')).exists():
+        raise EventFull()
+
+
+def filter_events(events, params, gamer):
+    """Apply the list filters in `params` to a queryset of events
+
+    Filters, all optional and combined with AND:
+      from -- First day, `YYYY-MM-DD`, today when not given
+      to -- Last day, `YYYY-MM-DD`
+      game -- Game id, also accepted as `gameId`
+      game_type -- Game type id
+      location -- Exact location
+      organizer -- Gamer id of the organizer
+      joined -- `true` or `false`, whether `gamer` signed up
+
+    Each equality filter is backed by a (column, event_day, event_time,
+    id) index, so the date range and calendar order come from the same
+    index scan whichever filter is used.
+
+    Raises:
+        ValueError -- If a filter's value is malformed
+
+    Returns:
+        QuerySet -- The matching events in calendar order
+    """
+    first_day = day_param(params, 'from') or timezone.localdate()
+    events = events.filter(event_day__gte=first_day)
+
+    last_day = day_param(params, 'to')
+    if last_day is not None:
+        events = events.filter(event_day__lte=last_day)
+
+    game = id_param(params, 'game')
+    if game is None:
+        game = id_param(params, 'gameId')
+    if game is not None:
+        events = events.filter(game_id=game)
+
+    game_type = id_param(params, 'game_type')
+    if game_type is not None:
+        events = events.filter(game__game_type_id=game_type)
+
+    location = params.get('location', None)
+    if location:
+        events = events.filter(location=location)
+
+    organizer = id_param(params, 'organizer')
+    if organizer is not None:
+        events = events.filter(gamer_id=organizer)
+
+    joined = params.get('joined', None)
+    if joined is not None:
+        if joined not in ('true', 'false'):
+            raise ValueError("joined must be true or false")
+        if joined == 'true':
+            # Start from the gamer's few signups rather than every event
+            events = events.filter(
+                pk__in=EventGamer.objects.filter(gamer=gamer).values('event_id'))
+        else:
+            events = events.exclude(
+                Exists(EventGamer.objects.filter(event=OuterRef('pk'), gamer=gamer)))
+
+    return events.order_by(*EventPagination.ordering)
+
+
+def day_param(params, name):
+    """Date in a query param, None if it isn't there
+
+    Raises:
+        ValueError -- If it isn't a valid `YYYY-MM-DD` date
+    """
+    value = params.get(name, None)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f"{name} must be a date like 2021-03-01")
+    return day
+
+
+def id_param(params, name):
+    """Integer id in a query param, None if it isn't there
+
+    Raises:
+        ValueError -- If it isn't a whole number the database can store
+    """
+    value = params.get(name, None)
+    if not value:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an id")
+    low, high = connection.ops.integer_field_range('BigIntegerField')
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be an id")
+    return value
+
+
+def export_row(event):
+    """Flat representation of an event and its attendees for exports"""
+    return {
+        "id": event.id,
+        "event_day": event.event_day,
+        "event_time": event.event_time,
+        "location": event.location,
+        "game_id": event.game_id,
+        "game": event.game.title,
+        "organizer_id": event.gamer_id,
+        "organizer": event.gamer.user.username,
+        "attendee_count": event.attendee_count,
+        "attendees": [signup.gamer.user.username for signup in event.eventgamer_set.all()],
+    }
+
+
+def requested_ids(request, key):
+    """List of integer ids in the request body, or None if malformed"""
+    if not isinstance(request.data, dict):
+        return None
+    ids = request.data.get(key, None)
+    # `True` is an int too, but not an id
+    if not isinstance(ids, list) or not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return None
+    return ids
+
+
+def signup_results(ids, known, key, seats=None):
+    """Signup status for each requested id
+
+    Method arguments:
+      ids -- Requested ids, in request order
+      known -- Maps ids that exist to (already signed up, free seats)
+      key -- Name of the id in each result, `gamer` or `event`
+      seats -- Free seats shared by every id, when they're all for one event
+    """
+    results = []
+    seen = set()
+    for pk in ids:
+        if pk not in known:
+            result_status = "not_found"
+        elif known[pk][0] or pk in seen:
+            result_status = "already_signed_up"
+        elif (known[pk][1] if seats is None else seats) < 1:
+            result_status = "full"
+        else:
+            result_status = "signed_up"
+            if seats is not None:
+                seats -= 1
+        seen.add(pk)
+        results.append({key: pk, "status": result_status})
+    return results
+
 class EventUserSerializer(serializers.ModelSerializer):
     """JSON serializer for event organizer's related Django user"""
     class Meta:
@@ -194,15 +639,16 @@ class EventGamerSerializer(serializers.ModelSerializer):
         model = Gamer
         fields = ['user']
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for events"""
     gamer = EventGamerSerializer(many=False)
     game = GameSerializer(many=False)
 
     class Meta:
         model = Event
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'game', 'gamer',
-                  'location', 'event_time', 'event_day', 'joined')
+                  'location', 'event_time', 'event_day', 'attendee_count', 'joined')
 
 class GameSerializer(serializers.ModelSerializer):
     """JSON serializer for games"""
@@ -1,16 +1,36 @@
 """View module for handling requests about games"""
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Count, Max
 from rest_framework import status
 from django.http import HttpResponseServerError
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
 from rest_framework import status
+from levelupapi.importer import GameImporter
+from levelupapi.instrumentation import TimedListSerializer, TimedSerializerMixin
 from levelupapi.models import Game, GameType, Gamer
+from levelupapi.pagination import GamePagination
+from levelupapi.parsers import CSVParser, NDJSONParser
+from levelupapi.search import search_games
+from levelupapi.views.asyncread import AsyncReadMixin
+from levelupapi.views.conditional import conditional, page_fingerprint
+from levelupapi.views.gametype import GameTypeSerializer, gametypes_version
+from levelupapi.views.queryplan import QueryPlanMixin, SparseFieldsMixin
+from levelupapi.views.replica import ReplicaReadMixin
 
 
-class Games(ViewSet):
+class Games(AsyncReadMixin, ReplicaReadMixin, QueryPlanMixin, ViewSet):
     """Level up games"""
+    queryset = Game.objects.all()
+
+    def get_serializer_class(self):
+        """Games are rendered, and eager loaded, by GameSerializer"""
+        return GameSerializer
 
     def create(self, request):
         """Handle POST operations
@@ -20,7 +40,7 @@ class Games(ViewSet):
         """
 
         # Uses the token passed in the `Authorization` header
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = request.gamer
         # Create a new Python instance of the Game class
         # and set its properties from what was sent in the
         # body of the request from the client.
@@ -58,15 +78,25 @@ class Games(ViewSet):
         Returns:
             Response -- JSON serialized game instance
         """
+        # Clients that already have the latest version of the game
+        # get an empty 304 response
+        changes = Game.objects.filter(pk=pk).values_list(
+            'updated_at', 'gamer__updated_at').first()
+        last_modified = max(changes) if changes is not None else None
+        not_modified, headers = conditional(
+            request, (changes, gametypes_version()), last_modified)
+        if not_modified is not None:
+            return not_modified
+
         try:
             # `pk` is a parameter to this function, and
             # Django parses it from the URL route parameter
             #   http://localhost:8000/games/2
             #
             # The `2` at the end of the route becomes `pk`
-            game = Game.objects.get(pk=pk)
+            game = self.get_queryset().get(pk=pk)
             serializer = GameSerializer(game, context={'request': request})
-            return Response(serializer.data)
+            return Response(serializer.data, headers=headers)
         except Game.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
         except Exception as ex:
@@ -78,7 +108,7 @@ class Games(ViewSet):
         Returns:
             Response -- Empty body with 204 status code
         """
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = request.gamer
 
         # Do mostly the same thing as POST, but instead of
         # creating a new instance of Game, get the game record
@@ -119,11 +149,20 @@ class Games(ViewSet):
     def list(self, request):
         """Handle GET requests to games resource
 
+        With `q`, the games matching every word of it, each word as a
+        prefix, are searched for instead, and up to `limit` of them are
+        returned with no next link. Games with all the words in their
+        title come first, then the games matching in their description,
+        each best match first. On SQLite only the newest
+        `LEVELUP_SEARCH_CANDIDATES` matches of each are ranked, so for a
+        very common word older games can be missing from the results.
+
         Returns:
             Response -- JSON serialized list of games
         """
-        # Get all game records from the database
-        games = Game.objects.all()
+        # Get all game records from the database, joined to whatever
+        # related rows the requested fields need
+        games = self.get_queryset()
 
         # Support filtering games by type
         #    http://localhost:8000/games?type=1
@@ -131,19 +170,107 @@ class Games(ViewSet):
         # That URL will retrieve all tabletop games
         game_type = self.request.query_params.get('type', None)
         if game_type is not None:
-            games = games.filter(gametype__id=game_type)
+            low, high = connection.ops.integer_field_range('BigIntegerField')
+            try:
+                game_type = int(game_type)
+            except ValueError:
+                game_type = None
+            if game_type is None or not low <= game_type <= high:
+                return Response({"reason": "type must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+            games = games.filter(game_type_id=game_type)
+
+        # Support full text search of titles and descriptions, best
+        # match first. Every word matches as a prefix.
+        #    http://localhost:8000/games?q=clu&limit=20
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            limit = GamePagination().get_page_size(request)
+            serializer = GameSerializer(
+                search_games(games, q, limit), many=True, context={'request': request})
+            return Response(serializer.data)
+
+        # Support keyset pagination
+        #    http://localhost:8000/games?pagination=cursor
+        paginator = None
+        if GamePagination.requested(request):
+            # A page is validated by the rows on it, so it costs the
+            # same however many games come before or after it
+            paginator = GamePagination()
+            games = paginator.paginate_queryset(games, request, view=self)
+            fingerprint = (
+                page_fingerprint(games, relations=('gamer',)), paginator.next_position)
+        else:
+            # Deleted games show up in the count. Owners move their own
+            # `updated_at`, changes to their users included.
+            latest = games.aggregate(
+                count=Count('id'),
+                updated_at=Max('updated_at'),
+                gamer_updated_at=Max('gamer__updated_at')
+            )
+            fingerprint = tuple(latest.values())
+
+        # Clients that polled since the last change to any of the
+        # games or their owners get an empty 304 response
+        not_modified, headers = conditional(request, fingerprint + (gametypes_version(),))
+        if not_modified is not None:
+            return not_modified
 
         serializer = GameSerializer(
             games, many=True, context={'request': request})
-        return Response(serializer.data)
+        if paginator is not None:
+            response = paginator.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    @action(methods=['post'], detail=False, url_path='import',
+            parser_classes=[NDJSONParser, CSVParser, JSONParser])
+    def bulk_import(self, request):
+        """Handle POST requests adding many games at once
+
+        The body is NDJSON, CSV or a JSON array of games, all owned by
+        the requesting gamer. Valid rows are imported even when others
+        aren't.
 
-class GameSerializer(serializers.ModelSerializer):
+        Returns:
+            Response -- JSON report of the rows imported and the errors
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"reason": "Expected a list of games"}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = GameImporter(gamer=request.gamer).run(request.data)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+class GameUserSerializer(serializers.ModelSerializer):
+    """JSON serializer for game owner's related Django user"""
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name')
+
+
+class GameGamerSerializer(serializers.ModelSerializer):
+    """JSON serializer for game owner"""
+    user = GameUserSerializer(many=False)
+
+    class Meta:
+        model = Gamer
+        fields = ('id', 'user', 'bio')
+
+
+class GameSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """JSON serializer for games
 
     Arguments:
         serializer type
     """
+    game_type = GameTypeSerializer(many=False)
+    gamer = GameGamerSerializer(many=False)
+
     class Meta:
         model = Game
         fields = ('id', 'title', 'number_of_players', 'description',  'game_type', 'gamer')
-        depth = 2
\ No newline at end of file
+        list_serializer_class = TimedListSerializer
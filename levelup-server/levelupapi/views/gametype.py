@@ -1,13 +1,51 @@
 """View module for handling requests about game types"""
-from django.http import HttpResponseServerError
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.cache import get_conditional_response
+from rest_framework import status
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
+from levelupapi.instrumentation import TimedListSerializer, TimedSerializerMixin
 from levelupapi.models import GameType
+from levelupapi.views.asyncread import AsyncReadMixin
+from levelupapi.views.replica import ReplicaReadMixin
 
+GAMETYPES_VERSION_KEY = 'levelup:gametypes:version'
 
-class GameTypes(ViewSet):
-    """Level up game types"""
+
+def gametypes_version():
+    """Version of the game type catalog, bumped whenever it changes"""
+    version = cache.get(GAMETYPES_VERSION_KEY)
+
+    if version is None:
+        # Start from the clock, so a flushed or expired version never
+        # hands out a version, and ETag, that was used before
+        cache.add(GAMETYPES_VERSION_KEY, time.time_ns(),
+                  settings.LEVELUP_GAMETYPES_VERSION_TIMEOUT)
+        version = cache.get(GAMETYPES_VERSION_KEY)
+
+    return version
+
+
+def bump_gametypes_version():
+    """Invalidate the cached catalog and every ETag handed out for it"""
+    try:
+        cache.incr(GAMETYPES_VERSION_KEY)
+    except ValueError:
+        # Nothing cached, the next read starts a new version
+        pass
+
+
+class GameTypes(AsyncReadMixin, ReplicaReadMixin, ViewSet):
+    """Level up game types
+
+    Game types hardly ever change, so the serialized catalog is cached
+    under its version and clients revalidate with `If-None-Match`.
+    """
 
     def retrieve(self, request, pk=None):
         """Handle GET requests for single game type
@@ -15,12 +53,20 @@ class GameTypes(ViewSet):
         Returns:
             Response -- JSON serialized game type
         """
-        try:
-            game_type = GameType.objects.get(pk=pk)
-            serializer = GameTypeSerializer(game_type, context={'request': request})
-            return Response(serializer.data)
-        except Exception as ex:
-            return HttpResponseServerError(ex)
+        version = gametypes_version()
+        etag = f'"gametypes-{version}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        for game_type in self.catalog(request, version):
+            if str(game_type['id']) == str(pk):
+                return Response(game_type, headers={'ETag': etag})
+
+        return Response(
+            {'message': 'GameType matching query does not exist.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
 
     def list(self, request):
         """Handle GET requests to get all game types
@@ -28,16 +74,38 @@ class GameTypes(ViewSet):
         Returns:
             Response -- JSON serialized list of game types
         """
-        gametypes = GameType.objects.all()
+        version = gametypes_version()
+        etag = f'"gametypes-{version}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        return Response(self.catalog(request, version), headers={'ETag': etag})
+
+    def catalog(self, request, version):
+        """Serialized list of every game type, from the cache if possible"""
+        cache_key = f'levelup:gametypes:{version}'
+        catalog = cache.get(cache_key)
+
+        if catalog is None:
+            # Cached until the next change, so read it from the primary
+            # rather than a replica that may not have the change yet
+            gametypes = GameType.objects.using(DEFAULT_DB_ALIAS).all()
+
+            # Note the addtional `many=True` argument to the
+            # serializer. It's needed when you are serializing
+            # a list of objects instead of a single object.
+            serializer = GameTypeSerializer(
+                gametypes, many=True, context={'request': request})
+            catalog = list(serializer.data)
+            # Kept at least as long as the version, so a version is
+            # never reloaded with different rows
+            cache.set(cache_key, catalog,
+                      settings.LEVELUP_GAMETYPES_VERSION_TIMEOUT or DEFAULT_TIMEOUT)
 
-        # Note the addtional `many=True` argument to the
-        # serializer. It's needed when you are serializing
-        # a list of objects instead of a single object.
-        serializer = GameTypeSerializer(
-            gametypes, many=True, context={'request': request})
-        return Response(serializer.data)
+        return catalog
 
-class GameTypeSerializer(serializers.ModelSerializer):
+class GameTypeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for game types
 
     Arguments:
@@ -46,3 +114,4 @@ class GameTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = GameType
         fields = ('id', 'label')
+        list_serializer_class = TimedListSerializer
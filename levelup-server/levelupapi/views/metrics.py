@@ -0,0 +1,19 @@
+"""View module for exposing request metrics to Prometheus"""
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from levelupapi.instrumentation import exposition
+
+
+def metrics(request):
+    '''Serves the request histograms of this process in Prometheus' text format
+
+    Only there when `LEVELUP_METRICS_ENABLED` is set. Keep it reachable
+    from the metrics scraper only, it isn't authenticated.
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    if not settings.LEVELUP_METRICS_ENABLED:
+        raise Http404()
+
+    return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,15 +1,38 @@
 """View module for handling requests about park areas"""
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
+from levelupapi.instrumentation import TimedListSerializer, TimedSerializerMixin
 from levelupapi.models import Event, Gamer, Game
+from levelupapi.views.asyncread import AsyncReadMixin
+from levelupapi.views.queryplan import eager_load
+from levelupapi.views.replica import ReplicaReadMixin
 
 
-class Profile(ViewSet):
-    """Gamer can see profile information"""
+def profile_cache_key(gamer_id):
+    """Cache key holding a gamer's serialized profile"""
+    return f'levelup:profile:{gamer_id}'
+
+
+def forget_profiles(gamer_ids):
+    """Drop the cached profiles of gamers whose profile changed"""
+    cache.delete_many([profile_cache_key(gamer_id) for gamer_id in gamer_ids])
+
+
+class Profile(AsyncReadMixin, ReplicaReadMixin, ViewSet):
+    """Gamer can see profile information
+
+    Each gamer's profile is cached until they sign up for or leave an
+    event, or one of their events, its game or their own details change.
+    Without a cache shared by every worker it isn't cached at all, as the
+    change would only reach the worker that made it.
+    """
 
     def list(self, request):
         """Handle GET requests to profile resource
@@ -17,18 +40,30 @@ class Profile(ViewSet):
         Returns:
             Response -- JSON representation of user info and events
         """
-        gamer = Gamer.objects.get(user=request.auth.user)
-        events = Event.objects.filter(eventgamer__gamer=gamer)
-
-        events = EventSerializer(
-            events, many=True, context={'request': request})
-        gamer = GamerSerializer(
-            gamer, many=False, context={'request': request})
-
-        # Manually construct the JSON structure you want in the response
-        profile = {}
-        profile["gamer"] = gamer.data
-        profile["events"] = events.data
+        gamer = request.gamer
+        cache_key = profile_cache_key(gamer.pk)
+        profile = cache.get(cache_key)
+
+        if profile is None:
+            # Cold cache, load the events along with their games. The
+            # profile is cached, so it is read from the primary rather
+            # than a replica that may not have the latest signups yet
+            events = eager_load(
+                Event.objects.using(DEFAULT_DB_ALIAS).filter(eventgamer__gamer=gamer),
+                EventSerializer(context={'request': request}))
+
+            events = EventSerializer(
+                events, many=True, context={'request': request})
+            gamer = GamerSerializer(
+                gamer, many=False, context={'request': request})
+
+            # Manually construct the JSON structure you want in the response
+            profile = {}
+            profile["gamer"] = gamer.data
+            profile["events"] = events.data
+
+            if settings.LEVELUP_PROFILE_CACHE_TIMEOUT:
+                cache.set(cache_key, profile, settings.LEVELUP_PROFILE_CACHE_TIMEOUT)
 
         return Response(profile)
 
@@ -39,7 +74,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('first_name', 'last_name', 'username')
 
 
-class GamerSerializer(serializers.ModelSerializer):
+class GamerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for gamers"""
     user = UserSerializer(many=False)
 
@@ -55,11 +90,12 @@ class GameSerializer(serializers.ModelSerializer):
         fields = ('title',)
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for events"""
     game = GameSerializer(many=False)
 
     class Meta:
         model = Event
         fields = ('id', 'game', 'location', 'event_day', 'event_time', 'gamer')
+        list_serializer_class = TimedListSerializer
         
\ No newline at end of file
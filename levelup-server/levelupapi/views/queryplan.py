@@ -0,0 +1,153 @@
+"""Module for eager loading everything a serializer is going to render"""
+from rest_framework import serializers
+
+
+def query_plan(serializer, prefix='', prefetch_only=False):
+    """Collect the related lookups a serializer walks while rendering
+
+    Nested serializers advertise the relations they follow through their
+    fields, so the plan is derived from the serializer itself. Anything
+    the fields can't express (e.g. a `SerializerMethodField` that follows
+    a relation) can be listed in `Meta.select_related` or
+    `Meta.prefetch_related` on the serializer.
+
+    Method arguments:
+      serializer -- The serializer instance that will render the queryset
+      prefix -- Lookup path from the root model to this serializer's model
+      prefetch_only -- True once the path has crossed a to-many relation
+
+    Returns:
+        tuple -- (select_related lookups, prefetch_related lookups)
+    """
+    serializer = getattr(serializer, 'child', serializer)
+    select_related = []
+    prefetch_related = []
+
+    meta = getattr(serializer, 'Meta', None)
+    for lookup in getattr(meta, 'select_related', ()):
+        (prefetch_related if prefetch_only else select_related).append(prefix + lookup)
+    for lookup in getattr(meta, 'prefetch_related', ()):
+        prefetch_related.append(prefix + lookup)
+
+    for field in serializer.fields.values():
+        if field.source == '*':
+            continue
+
+        lookup = prefix + field.source.replace('.', '__')
+
+        if isinstance(field, serializers.ListSerializer):
+            # Nested list of related objects, e.g. `many=True`
+            prefetch_related.append(lookup)
+            nested = query_plan(field.child, lookup + '__', True)
+        elif isinstance(field, serializers.BaseSerializer):
+            # Nested single related object, e.g. a foreign key
+            if prefetch_only:
+                prefetch_related.append(lookup)
+            else:
+                select_related.append(lookup)
+            nested = query_plan(field, lookup + '__', prefetch_only)
+        elif isinstance(field, serializers.ManyRelatedField):
+            # List of primary keys for a many to many relation
+            prefetch_related.append(lookup)
+            continue
+        else:
+            continue
+
+        select_related.extend(nested[0])
+        prefetch_related.extend(nested[1])
+
+    return select_related, prefetch_related
+
+
+def eager_load(queryset, serializer):
+    """Apply a serializer's query plan to a queryset
+
+    Returns:
+        QuerySet -- The queryset with all related rows loaded up front
+    """
+    select_related, prefetch_related = query_plan(serializer)
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    return queryset
+
+
+class QueryPlanMixin:
+    """ViewSet mixin that eager loads whatever its serializer renders
+
+    Views set `queryset` to the base queryset and return their serializer
+    class from `get_serializer_class`, then read rows from `get_queryset`.
+    """
+    queryset = None
+    serializer_class = None
+
+    def get_serializer_class(self):
+        """Serializer class used to render this view's rows"""
+        return self.serializer_class
+
+    def get_serializer_context(self):
+        """Context handed to the serializer"""
+        return {'request': self.request}
+
+    def get_queryset(self):
+        """Base queryset with the serializer's query plan applied
+
+        Returns:
+            QuerySet -- Rows ready to be serialized without extra queries
+        """
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context())
+        return eager_load(self.queryset.all(), serializer)
+
+
+class SparseFieldsMixin:
+    """Serializer mixin that honours the `fields` and `expand` query params
+
+    `?fields=id,title` renders only the listed top level fields.
+    `?expand=gamer` renders only the listed relations as nested objects
+    and the rest as primary keys. Without `expand` every nested relation
+    is rendered in full. Because the query plan is derived from the
+    remaining fields, relations that aren't rendered aren't joined either.
+    Names the serializer doesn't have are answered with a 400 listing them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request', None)
+        if request is None:
+            return
+        params = getattr(request, 'query_params', request.GET)
+
+        relations = {name for name, field in self.fields.items()
+                     if isinstance(field, serializers.BaseSerializer)}
+        errors = {}
+
+        fields = params.get('fields', None)
+        if fields:
+            wanted = set(fields.split(',')) - {''}
+            unknown = wanted - set(self.fields)
+            if unknown:
+                errors['fields'] = [f"Unknown field: {name}" for name in sorted(unknown)]
+            for name in list(self.fields):
+                if name not in wanted:
+                    self.fields.pop(name)
+
+        expand = params.get('expand', None)
+        if expand is not None:
+            wanted = set(expand.split(',')) - {''}
+            unknown = wanted - relations
+            if unknown:
+                errors['expand'] = [f"Unknown relation: {name}" for name in sorted(unknown)]
+            for name, field in list(self.fields.items()):
+                if isinstance(field, serializers.BaseSerializer) and name not in wanted:
+                    collapsed = {'read_only': True}
+                    if field.source != name:
+                        collapsed['source'] = field.source
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(**collapsed)
+
+        if errors:
+            raise serializers.ValidationError(errors)
@@ -0,0 +1,37 @@
+"""Module for serving reads from the read replica"""
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from levelupapi.routers import read_database, remember_write, wrote_recently
+
+
+class ReplicaReadMixin:
+    """ViewSet mixin reading from `LEVELUP_READ_DATABASE` on GET requests
+
+    The database is picked once the user is known, so authentication
+    always reads from the primary. A user who has just written through
+    one of these views keeps reading from the primary for
+    `LEVELUP_READ_YOUR_WRITES_SECONDS`, so they always see their own
+    changes even when the replica lags behind.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        reset = read_database.set(None)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            read_database.reset(reset)
+
+        # `self.request` is DRF's request, which knows the token's user
+        user = self.request.user
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and user.is_authenticated):
+            remember_write(user.pk)
+
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if (settings.LEVELUP_READ_DATABASE is not None and request.method in SAFE_METHODS
+                and not wrote_recently(request.user.pk)):
+            read_database.set(settings.LEVELUP_READ_DATABASE)
@@ -1,2 +1,13 @@
 from .game_tests import GameTests
 from .event_tests import EventTest
+from .index_tests import IndexTests
+from .auth_tests import AuthTests
+from .gametype_tests import GameTypeTests
+from .profile_tests import ProfileTests
+from .async_tests import AsyncReadTests
+from .sqlite_tests import SQLiteTests
+from .replica_tests import ReplicaTests
+from .throttle_tests import ThrottleTests
+from .benchmark_tests import BenchmarkTests
+from .metrics_tests import MetricsTests
+from .query_tests import QueryInspectorTests
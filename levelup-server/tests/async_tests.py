@@ -0,0 +1,69 @@
+import json
+import threading
+from unittest import mock
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+from rest_framework import status
+from levelupapi.models import GameType
+from levelupapi.views import GameTypes
+
+
+class AsyncReadTests(TransactionTestCase):
+    """
+    Reads run on the read pool's own database connections, so the data
+    has to be committed for them to see it
+    """
+
+    def setUp(self):
+        """
+        Create a new account and a game type
+        """
+        cache.clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post(url, data, content_type='application/json')
+        self.token = json.loads(response.content)["token"]
+
+        GameType.objects.create(label="Board game")
+
+    @override_settings(LEVELUP_ASYNC_READS=True)
+    def test_reads_run_on_read_pool(self):
+        """
+        Ensure GET requests are served from the read pool when enabled.
+        """
+        view = GameTypes.as_view({'get': 'list'})
+        self.assertTrue(iscoroutinefunction(view))
+        self.assertTrue(view.csrf_exempt)
+
+        threads = []
+        original = GameTypes.list
+
+        def list_and_record(viewset, request):
+            threads.append(threading.current_thread().name)
+            return original(viewset, request)
+
+        request = AsyncRequestFactory().get(
+            "/gametypes", headers={"Authorization": "Token " + self.token})
+        with mock.patch.object(GameTypes, 'list', list_and_record):
+            response = async_to_sync(view)(request)
+
+        response.render()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)[0]["label"], "Board game")
+        self.assertTrue(threads[0].startswith("levelup-read"))
+
+    def test_views_stay_sync_by_default(self):
+        """
+        Ensure WSGI deployments keep plain synchronous views.
+        """
+        view = GameTypes.as_view({'get': 'list'})
+        self.assertFalse(iscoroutinefunction(view))
@@ -0,0 +1,169 @@
+import json
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.hashers import PBKDF2PasswordHasher
+from levelupapi.models import Game, GameType, Gamer
+
+
+class AuthTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account
+        """
+        cache.clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+
+    def test_token_is_cached(self):
+        """
+        Ensure a token is only looked up in the database once.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        # Token and gamer lookups, then the game types
+        with self.assertNumQueries(3):
+            response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Both the token and the game types are cached now
+        with self.assertNumQueries(0):
+            response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Changing the gamer drops the cached entry
+        Gamer.objects.filter(pk=1).first().save()
+        with self.assertNumQueries(2):
+            self.client.get("/gametypes")
+
+    @override_settings(LEVELUP_AUTH_CACHE_TIMEOUT=0)
+    def test_token_not_cached_without_shared_cache(self):
+        """
+        Ensure a token that can't be dropped from every worker's cache
+        is looked up on every request.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.client.get("/gametypes")
+
+        # Token and gamer lookups, the game types are cached
+        with self.assertNumQueries(2):
+            response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_logout_revokes_token(self):
+        """
+        Ensure a logged out token stops working even though it was cached.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post("/logout")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Logging back in hands out a new token
+        self.client.credentials()
+        data = {"username": "steve", "password": "Admin8*"}
+        response = self.client.post("/login", data, format='json')
+        json_response = json.loads(response.content)
+        self.assertTrue(json_response["valid"])
+        self.assertNotEqual(json_response["token"], self.token)
+
+    def test_views_reuse_request_gamer(self):
+        """
+        Ensure views use the gamer resolved while authenticating instead
+        of looking it up again.
+        """
+        GameType.objects.create(label="Board game")
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.client.get("/gametypes")
+
+        # Expected queries for each request, none of them for the gamer
+        requests = [
+            ("get", "/events", None, 2),
+            ("get", "/profile", None, 1),
+            ("post", "/games", {"title": "Clue", "game_type": 1,
+                                "number_of_players": 6, "description": "Fun"}, 2),
+            ("put", "/games/1", {"title": "Clue", "game_type": 1,
+                                 "number_of_players": 4, "description": "Fun"}, 4),
+            ("post", "/events", {"event_day": "2020-10-25", "event_time": "14:30",
+                                 "game": 1, "location": "Basement"}, 5),
+            ("post", "/events/1/signup", None, 4),
+        ]
+        for method, url, data, expected in requests:
+            with self.assertNumQueries(expected) as queries:
+                getattr(self.client, method)(url, data, format='json')
+            self.assertFalse(any(
+                'WHERE "levelupapi_gamer"."user_id" =' in query["sql"]
+                for query in queries.captured_queries), url)
+
+    def test_gamer_resolved_lazily_once(self):
+        """
+        Ensure the gamer is looked up once, with its user, on a cache miss.
+        """
+        Game.objects.create(title="Clue", game_type=GameType.objects.create(label="Board"),
+                            number_of_players=4, description="Fun", gamer_id=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        cache.clear()
+
+        # Token and user, gamer, then the profile's events
+        with self.assertNumQueries(3):
+            response = self.client.get("/profile")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_register_in_one_transaction(self):
+        """
+        Ensure a new account is written in one go, and not at all on failure.
+        """
+        data = {
+            "username": "joe",
+            "password": "Admin8*",
+            "email": "joe@stevebrownlee.com",
+            "first_name": "Joe",
+            "last_name": "Shepherd",
+            "bio": "Hi"
+        }
+
+        # User, gamer and token, inside a savepoint
+        with self.assertNumQueries(5):
+            response = self.client.post("/register", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        data["username"] = "jack"
+        with mock.patch("levelupapi.views.auth.Token.objects.create", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post("/register", data, format='json')
+        self.assertFalse(User.objects.filter(username="jack").exists())
+        self.assertFalse(Gamer.objects.filter(user__username="jack").exists())
+
+    def test_password_hashing_cost(self):
+        """
+        Ensure the hashing cost follows settings, and old hashes get upgraded.
+        """
+        hasher = PBKDF2PasswordHasher()
+        with override_settings(LEVELUP_PBKDF2_ITERATIONS=1000):
+            encoded = hasher.encode("Admin8*", hasher.salt())
+            self.assertEqual(hasher.decode(encoded)["iterations"], 1000)
+            self.assertTrue(hasher.verify("Admin8*", encoded))
+            self.assertFalse(hasher.must_update(encoded))
+
+        with override_settings(LEVELUP_PBKDF2_ITERATIONS=2000):
+            self.assertTrue(hasher.verify("Admin8*", encoded))
+            self.assertTrue(hasher.must_update(encoded))
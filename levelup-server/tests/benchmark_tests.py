@@ -0,0 +1,59 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count, F
+from rest_framework.test import APITestCase
+from levelupapi import benchmark
+from levelupapi.models import Event, EventGamer, Game, Gamer
+from levelupapi.seeding import seed
+
+
+class BenchmarkTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed(self):
+        """
+        Ensure seeded data is consistent and reproducible.
+        """
+        created = seed(gamers=20, games=5, events=30, signups_per_event=3, batch_size=7)
+        self.assertEqual(created["gamers"], 20)
+        self.assertEqual(created["games"], 5)
+        self.assertEqual(created["events"], 30)
+        self.assertEqual(EventGamer.objects.count(), created["signups"])
+
+        # Attendee counts match the signups, and no event is overbooked
+        self.assertFalse(Event.objects.annotate(signups=Count("eventgamer")).exclude(
+            attendee_count=F("signups")).exists())
+        self.assertFalse(Event.objects.filter(
+            attendee_count__gt=F("game__number_of_players")).exists())
+
+        days = list(Event.objects.order_by("pk").values_list("event_day", flat=True))
+        Event.objects.all().delete()
+        Game.objects.all().delete()
+        seed(gamers=0, games=5, events=30, signups_per_event=3)
+        self.assertEqual(list(Event.objects.order_by("pk").values_list("event_day", flat=True)), days)
+
+    def test_seed_scale_command(self):
+        """
+        Ensure the command reports what it created.
+        """
+        out = StringIO()
+        call_command("seed_scale", "--gamers", "5", "--games", "2", "--events", "4",
+                     "--signups-per-event", "2", stdout=out)
+        self.assertIn("Created 5 gamers, 2 games, 4 events", out.getvalue())
+        self.assertEqual(Gamer.objects.count(), 5)
+
+    def test_benchmark_covers_every_route(self):
+        """
+        Ensure every route is benchmarked and answers successfully.
+        """
+        seed(gamers=5, games=2, events=4, signups_per_event=2)
+        gamer = Gamer.objects.select_related("user").first()
+
+        results = benchmark.run(gamer, "levelup", requests=2, warmup=0)
+        self.assertEqual(len(results), len(benchmark.routes(gamer, "levelup")))
+        for name, result in results.items():
+            self.assertTrue(all(code < 400 for code in result["statuses"]), name)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+            self.assertGreater(result["requests_per_second"], 0)
@@ -1,7 +1,18 @@
+import base64
+import csv
 import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.test import APITestCase
-from levelupapi.models import Event, Game, GameType
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupapi.views import Events
 
 class EventTest(APITestCase):
     def setUp(self):
@@ -45,6 +56,14 @@ class EventTest(APITestCase):
         game.game_type_id = game_type
         game.save()
 
+    def authenticate(self):
+        """
+        Send the token with every request, and get it into the auth cache
+        so query counts only cover the endpoint's own work.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.client.get("/gametypes")
+
     def test_create_event(self):
         """
         Ensure we can create a new game.
@@ -90,10 +109,13 @@ class EventTest(APITestCase):
         event.save()
 
         # Make sure request is authenticated
-        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.authenticate()
 
-        # Initiate request and store response
-        response = self.client.get(f"/events/{event.id}")
+        # Initiate request and store response. After checking when the
+        # event last changed, it comes back with everything nested in it
+        # in one query
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/events/{event.id}")
 
          # Parse the JSON in the response body
         json_response = json.loads(response.content)
@@ -106,5 +128,472 @@ class EventTest(APITestCase):
         self.assertEqual(json_response["event_time"], "14:39:00")
         self.assertEqual(json_response["location"], "Tom's")
 
-    
+    def test_list_events_query_count(self):
+        """
+        Ensure listing events costs the same number of queries no
+        matter how many events there are.
+        """
+        self.authenticate()
+        event_day = date.today() + timedelta(days=1)
+
+        for total in (1, 100, 1000):
+            Event.objects.all().delete()
+            Event.objects.bulk_create([
+                Event(event_day=event_day, event_time="14:30", game_id=1,
+                      location="Basement", gamer_id=1)
+                for _ in range(total)
+            ])
+            EventGamer.objects.create(event=Event.objects.first(), gamer_id=1)
+
+            # When the events last changed, then the events query itself
+            with self.assertNumQueries(2):
+                response = self.client.get("/events")
+
+            json_response = json.loads(response.content)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(json_response), total)
+            self.assertEqual(
+                [event["joined"] for event in json_response].count(True), 1)
+
+    def test_list_events_cursor_pagination(self):
+        """
+        Ensure clients can walk every event in calendar order with a cursor.
+        """
+        self.authenticate()
+        today = date.today()
+
+        # Several events share a day and time, so the id has to break ties
+        Event.objects.bulk_create([
+            Event(event_day=today + timedelta(days=i % 4),
+                  event_time=f"1{i % 3}:00", game_id=1,
+                  location="Basement", gamer_id=1)
+            for i in range(25)
+        ])
+        expected = list(Event.objects.order_by(
+            'event_day', 'event_time', 'id').values_list('id', flat=True))
+
+        seen = []
+        url = "/events?pagination=cursor"
+        while url is not None:
+            # Just the page itself, no COUNT
+            with self.assertNumQueries(1) as queries:
+                response = self.client.get(url)
+            self.assertFalse(any(
+                "COUNT" in query["sql"] for query in queries.captured_queries))
+            self.assertNotIn("OFFSET", queries.captured_queries[0]["sql"])
+
+            json_response = json.loads(response.content)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(json_response["results"]), 10)
+            seen.extend(event["id"] for event in json_response["results"])
+            url = json_response["next"]
+
+        self.assertEqual(seen, expected)
+
+        # Cursors that don't decode, or hold values of the wrong type
+        cursors = ["nope", base64.urlsafe_b64encode(b'["2021-03-01","14:30","x"]').decode()]
+        for cursor in cursors:
+            response = self.client.get(f"/events?pagination=cursor&cursor={cursor}")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for position in (b'["x"]', b'[1e400]', b'[99999999999999999999999]', b'[true]'):
+            cursor = base64.urlsafe_b64encode(position).decode()
+            response = self.client.get(f"/games?pagination=cursor&cursor={cursor}")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+    def test_signup_and_leave_event(self):
+        """
+        Ensure gamers can sign up for an event once and then leave it.
+        """
+        event = Event.objects.create(
+            event_day="2020-10-25", event_time="14:30", game_id=1,
+            location="Basement", gamer_id=1)
+        self.authenticate()
+
+        # Taking a seat and the insert, which run in a savepoint here
+        # because each test is wrapped in a transaction
+        with self.assertNumQueries(4):
+            response = self.client.post(f"/events/{event.id}/signup")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(EventGamer.objects.filter(event=event, gamer_id=1).exists())
+
+        response = self.client.post(f"/events/{event.id}/signup")
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(EventGamer.objects.filter(event=event).count(), 1)
+        event.refresh_from_db()
+        self.assertEqual(event.attendee_count, 1)
+
+        # Finding the signup, its delete and giving up the seat, in a
+        # savepoint
+        with self.assertNumQueries(5):
+            response = self.client.delete(f"/events/{event.id}/signup")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(EventGamer.objects.filter(event=event).exists())
+        event.refresh_from_db()
+        self.assertEqual(event.attendee_count, 0)
+
+        response = self.client.delete(f"/events/{event.id}/signup")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post("/events/999/signup")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleted_gamer_gives_up_seats(self):
+        """
+        Ensure signups deleted along with their gamer free their seats.
+        """
+        event = Event.objects.create(
+            event_day="2020-10-25", event_time="14:30", game_id=1,
+            location="Basement", gamer_id=1)
+        user = User.objects.create_user(username="joe", password="Admin8*")
+        gamer = Gamer.objects.create(user=user, bio="Here for the snacks")
+        for signup in (gamer, Gamer.objects.get(pk=1)):
+            EventGamer.objects.create(event=event, gamer=signup)
+        Event.objects.recount_attendees()
+
+        user.delete()
+        event.refresh_from_db()
+        self.assertEqual(event.attendee_count, 1)
+        self.assertEqual(EventGamer.objects.filter(event=event).count(), 1)
+
+    def test_bulk_signups(self):
+        """
+        Ensure organizers can sign many gamers up, and gamers can sign
+        up for many events, in one request.
+        """
+        event = Event.objects.create(
+            event_day="2020-10-25", event_time="14:30", game_id=1,
+            location="Basement", gamer_id=1)
+        other = Event.objects.create(
+            event_day="2020-10-26", event_time="14:30", game_id=1,
+            location="Attic", gamer_id=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        url = f"/events/{event.id}/signups"
+        response = self.client.post(url, {"gamers": [1, 99]}, format='json')
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response["results"], [
+            {"gamer": 1, "status": "signed_up"},
+            {"gamer": 99, "status": "not_found"},
+        ])
+
+        url = "/events/signups"
+        data = {"events": [event.id, other.id, other.id, 99]}
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response["results"], [
+            {"event": event.id, "status": "already_signed_up"},
+            {"event": other.id, "status": "signed_up"},
+            {"event": other.id, "status": "already_signed_up"},
+            {"event": 99, "status": "not_found"},
+        ])
+        self.assertEqual(EventGamer.objects.filter(gamer_id=1).count(), 2)
+
+        # Anything but a list of ids is turned away, booleans included
+        for data in ({"events": "all"}, {"events": [True]}, [event.id]):
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            f"/events/{event.id}/signups", {"gamers": [True]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_event_capacity(self):
+        """
+        Ensure a full event turns signups away and counts can be repaired.
+        """
+        Game.objects.filter(pk=1).update(number_of_players=1)
+        event = Event.objects.create(
+            event_day="2020-10-25", event_time="14:30", game_id=1,
+            location="Basement", gamer_id=1, attendee_count=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        response = self.client.post(f"/events/{event.id}/signup")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(EventGamer.objects.filter(event=event).exists())
+
+        response = self.client.post(
+            f"/events/{event.id}/signups", {"gamers": [1]}, format='json')
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["results"], [{"gamer": 1, "status": "full"}])
+
+        # The count drifted from the signups, recount it
+        call_command("recount_attendees", stdout=StringIO())
+        response = self.client.get(f"/events/{event.id}")
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["attendee_count"], 0)
+
+        response = self.client.post(f"/events/{event.id}/signup")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_conditional_get_events(self):
+        """
+        Ensure polling clients get a 304 until an event or signup changes.
+        """
+        event = Event.objects.create(
+            event_day=date.today() + timedelta(days=1), event_time="14:30",
+            game_id=1, location="Basement", gamer_id=1)
+        self.authenticate()
+
+        response = self.client.get("/events")
+        etag = response["ETag"]
+
+        # Only the query finding when events last changed
+        with self.assertNumQueries(1):
+            response = self.client.get("/events", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Other query params get a response of their own
+        response = self.client.get("/events?fields=id", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Signing up changes `joined` and the attendee count
+        self.client.post(f"/events/{event.id}/signup")
+        response = self.client.get("/events", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(json.loads(response.content)[0]["joined"])
+
+        response = self.client.get(f"/events/{event.id}")
+        response = self.client.get(
+            f"/events/{event.id}", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_conditional_get_events_after_organizer_change(self):
+        """
+        Ensure a change to an organizer or game owner isn't answered with a 304.
+        """
+        event = Event.objects.create(
+            event_day=date.today() + timedelta(days=1), event_time="14:30",
+            game_id=1, location="Basement", gamer_id=1)
+        self.authenticate()
+
+        urls = ("/events", "/events?pagination=cursor", f"/events/{event.id}")
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+
+        user = event.gamer.user
+        user.last_name = "Brownlee"
+        user.save()
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etags[url] = response["ETag"]
+
+        # The game's owner is shown as well
+        gamer = event.game.gamer
+        gamer.bio = "Still into board games"
+        gamer.save()
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_conditional_get_event_pages(self):
+        """
+        Ensure cursor pages are validated by their own rows, without
+        touching the rest of the events.
+        """
+        today = date.today()
+        Event.objects.bulk_create([
+            Event(event_day=today + timedelta(days=i), event_time="14:30",
+                  game_id=1, location="Basement", gamer_id=1)
+            for i in range(15)
+        ])
+        events = Event.objects.order_by('event_day')
+        first, last = events.first(), events.last()
+        self.authenticate()
+
+        url = "/events?pagination=cursor"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertNotIn("Last-Modified", response)
+
+        # Just the page itself
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Events on later pages don't change this one
+        self.client.post(f"/events/{last.id}/signup")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Signing up for an event on it does
+        self.client.post(f"/events/{first.id}/signup")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(json.loads(response.content)["results"][0]["joined"])
+
+    def test_conditional_get_events_after_delete(self):
+        """
+        Ensure deleting an older event isn't hidden by a date check.
+        """
+        older, newer = [
+            Event.objects.create(
+                event_day=date.today() + timedelta(days=days), event_time="14:30",
+                game_id=1, location="Basement", gamer_id=1)
+            for days in (1, 2)
+        ]
+        self.authenticate()
+
+        # Lists are validated by ETag only, as deleting an event doesn't
+        # change when the remaining events last changed
+        response = self.client.get("/events")
+        self.assertNotIn("Last-Modified", response)
+        since = http_date(newer.updated_at.timestamp() + 60)
+
+        older.delete()
+        for url in ("/events", "/events?pagination=cursor"):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            events = json.loads(response.content)
+            events = events["results"] if "results" in events else events
+            self.assertEqual([event["id"] for event in events], [newer.id])
+
+    def test_export_events(self):
+        """
+        Ensure the whole calendar streams as NDJSON or CSV in a fixed
+        number of queries.
+        """
+        self.authenticate()
+        today = date.today()
+        Event.objects.bulk_create([
+            Event(event_day=today + timedelta(days=i), event_time="14:30",
+                  game_id=1, location="Basement", gamer_id=1)
+            for i in range(5)
+        ])
+        EventGamer.objects.create(event=Event.objects.first(), gamer_id=1)
+
+        response = self.client.get("/events/export?format=ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+
+        # The events, then the attendees of each chunk of events
+        with self.assertNumQueries(2):
+            content = b"".join(response.streaming_content).decode()
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["attendees"], ["steve"])
+        self.assertEqual(rows[0]["organizer"], "steve")
+        self.assertEqual(rows[0]["game"], "title")
+        self.assertEqual(rows[1]["attendees"], [])
+        self.assertEqual([row["event_day"] for row in rows],
+                         [(today + timedelta(days=i)).isoformat() for i in range(5)])
+
+        response = self.client.get("/events/export?format=csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["attendees"], "steve")
+
+        response = self.client.get("/events/export?format=xml")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Media types the export can't render get NDJSON
+        response = self.client.get("/events/export", HTTP_ACCEPT="text/csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        response = self.client.get("/events/export", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+
+    async def test_export_events_asgi(self):
+        """
+        Ensure the export streams asynchronously under ASGI, rather than
+        being read into memory before it is sent.
+        """
+        today = date.today()
+        await Event.objects.abulk_create([
+            Event(event_day=today + timedelta(days=i), event_time="14:30",
+                  game_id=1, location="Basement", gamer_id=1)
+            for i in range(5)
+        ])
+
+        response = await self.async_client.get(
+            "/events/export", headers={"Authorization": "Token " + self.token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+
+        with mock.patch.object(Events, "export_chunk_size", 2):
+            response = await self.async_client.get(
+                "/events/export", headers={"Authorization": "Token " + self.token})
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])["location"], "Basement")
+
+    def test_import_events_command(self):
+        """
+        Ensure the import command loads events in chunks and reports bad rows.
+        """
+        rows = [
+            {"event_day": "2030-01-0" + str(i + 1), "event_time": "14:30",
+             "game": 1, "location": "Basement", "gamer": 1}
+            for i in range(5)
+        ]
+        rows.append({"event_day": "soon", "event_time": "14:30",
+                     "game": 1, "location": "Basement", "gamer": 1})
+        rows.append({"event_day": "2030-01-01", "event_time": "14:30",
+                     "game": 9, "location": "Basement", "gamer": 1})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.ndjson")
+            with open(path, "w") as ndjson:
+                ndjson.write("\n".join(json.dumps(row) for row in rows))
+                ndjson.write("\nnot json\n")
+
+            out, err = StringIO(), StringIO()
+            call_command("import_levelup", "events", path, "--chunk-size", "3",
+                         stdout=out, stderr=err)
+
+            with self.assertRaises(CommandError):
+                call_command("import_levelup", "events", path, "--gamer", "9")
+
+        self.assertIn("Imported 5 of 8 events", out.getvalue())
+        self.assertIn("Row 6: event_day", err.getvalue())
+        self.assertIn("Row 7: game: Game 9 does not exist.", err.getvalue())
+        self.assertIn("Row 8: row: Expected an object.", err.getvalue())
+        self.assertEqual(Event.objects.count(), 5)
+        self.assertEqual(Event.objects.filter(attendee_count=0).count(), 5)
+
+    def test_filter_events(self):
+        """
+        Ensure the list filters combine, and past events are left out by default.
+        """
+        self.authenticate()
+        today = date.today()
+        other_type = GameType.objects.create(label="Card game")
+        other_game = Game.objects.create(
+            title="Uno", number_of_players=4, description="Cards",
+            gamer_id=1, game_type=other_type)
+
+        past = Event.objects.create(event_day=today - timedelta(days=1), event_time="14:30",
+                                    game_id=1, location="Basement", gamer_id=1)
+        soon = Event.objects.create(event_day=today + timedelta(days=2), event_time="14:30",
+                                    game_id=1, location="Basement", gamer_id=1)
+        later = Event.objects.create(event_day=today + timedelta(days=30), event_time="10:00",
+                                     game=other_game, location="Library", gamer_id=1)
+        EventGamer.objects.create(event=later, gamer_id=1)
+
+        def listed(query=""):
+            response = self.client.get(f"/events?{query}")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [event["id"] for event in json.loads(response.content)]
+
+        week = (today + timedelta(days=7)).isoformat()
+        self.assertEqual(listed(), [soon.id, later.id])
+        self.assertEqual(listed(f"from={(today - timedelta(days=7)).isoformat()}"),
+                         [past.id, soon.id, later.id])
+        self.assertEqual(listed(f"to={week}"), [soon.id])
+        self.assertEqual(listed(f"game={other_game.id}"), [later.id])
+        self.assertEqual(listed(f"gameId={other_game.id}"), [later.id])
+        self.assertEqual(listed(f"game_type={other_type.id}"), [later.id])
+        self.assertEqual(listed("location=Library"), [later.id])
+        self.assertEqual(listed("organizer=1"), [soon.id, later.id])
+        self.assertEqual(listed("organizer=2"), [])
+        self.assertEqual(listed("joined=true"), [later.id])
+        self.assertEqual(listed(f"joined=false&to={week}&game=1&location=Basement"), [soon.id])
 
+        for query in ("from=yesterday", "to=2021-02-30", "game=clue", "joined=yes",
+                      "game=99999999999999999999999", "organizer=-99999999999999999999999"):
+            response = self.client.get(f"/events?{query}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
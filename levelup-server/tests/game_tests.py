@@ -1,4 +1,7 @@
 import json
+from io import StringIO
+from django.core.management import call_command
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.test import APITestCase
 from levelupapi.models import GameType, Gamer, Game
@@ -151,4 +154,276 @@ class GameTests(APITestCase):
 
         # GET GAME AGAIN TO VERIFY 404 response
         response = self.client.get(f"/games/{game.id}")
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_games_sparse_fields(self):
+        """
+        Ensure clients can ask for only some fields and skip the joins.
+        """
+        game = Game()
+        game.game_type_id = 1
+        game.title = "Sorry"
+        game.number_of_players = 4
+        game.description = "This is a test test"
+        game.gamer_id = 1
+        game.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        # Full output nests the game type and owner, without the
+        # owner's private user details
+        response = self.client.get("/games")
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response[0]["game_type"]["label"], "Board game")
+        self.assertEqual(json_response[0]["gamer"]["user"]["username"], "steve")
+        self.assertNotIn("password", json_response[0]["gamer"]["user"])
+
+        # With the token cached, when the games last changed and then
+        # a games query without any joins
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get("/games?fields=id,title")
+        self.assertNotIn("JOIN", queries.captured_queries[1]["sql"])
+
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response, [{"id": game.id, "title": "Sorry"}])
+
+        # Relations left out of `expand` are rendered as primary keys
+        response = self.client.get("/games?expand=game_type")
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response[0]["game_type"]["label"], "Board game")
+        self.assertEqual(json_response[0]["gamer"], 1)
+
+        # Names the games don't have are listed back, rather than ignored
+        response = self.client.get("/games?fields=id,nope&expand=title,gamer,nada")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content), {
+            "fields": ["Unknown field: nope"],
+            "expand": ["Unknown relation: nada", "Unknown relation: title"],
+        })
+
+    def test_conditional_get_games(self):
+        """
+        Ensure polling clients get a 304 until a game changes.
+        """
+        game = Game()
+        game.game_type_id = 1
+        game.title = "Sorry"
+        game.number_of_players = 4
+        game.description = "This is a test test"
+        game.gamer_id = 1
+        game.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        for url in ("/games", "/games?pagination=cursor", f"/games/{game.id}"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response["ETag"]
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+        # A single game can be checked by date as well
+        response = self.client.get(f"/games/{game.id}")
+        response = self.client.get(
+            f"/games/{game.id}", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Any change to the game shows up in both the list and the game
+        game.title = "Trouble"
+        game.save()
+        response = self.client.get("/games", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f"/games/{game.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["title"], "Trouble")
+
+    def test_conditional_get_games_after_owner_change(self):
+        """
+        Ensure a change to a game's owner isn't answered with a 304.
+        """
+        game = Game.objects.create(title="Sorry", game_type_id=1, number_of_players=4,
+                                   description="This is a test game", gamer_id=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        urls = ("/games", "/games?pagination=cursor", f"/games/{game.id}")
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+
+        # Logging in doesn't change anything shown
+        user = Gamer.objects.get(pk=1).user
+        user.save(update_fields=['last_login'])
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        user.first_name = "Stephen"
+        user.save()
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn(b'"first_name":"Stephen"', response.content)
+
+    def test_conditional_get_games_after_delete(self):
+        """
+        Ensure deleting an older game isn't hidden by a date check.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        older, newer = [
+            Game.objects.create(title=title, game_type_id=1, number_of_players=4,
+                                description="This is a test game", gamer_id=1)
+            for title in ("Clue", "Sorry")
+        ]
+
+        # Lists are validated by ETag only, as deleting a game doesn't
+        # change when the remaining games last changed
+        response = self.client.get("/games")
+        self.assertNotIn("Last-Modified", response)
+        since = http_date(newer.updated_at.timestamp() + 60)
+
+        older.delete()
+        for url in ("/games", "/games?pagination=cursor"):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            games = json.loads(response.content)
+            games = games["results"] if "results" in games else games
+            self.assertEqual([game["title"] for game in games], ["Sorry"])
+
+    def test_import_games(self):
+        """
+        Ensure games can be imported in bulk, skipping the rows with errors.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        rows = ["title,game_type,number_of_players,description"]
+        rows += [f"Game {i},1,4,Imported game" for i in range(50)]
+        rows += [
+            "No type,7,4,Imported game",
+            "Bad players,1,many,Imported game",
+            ",1,4,Imported game",
+        ]
+
+        # Warm up the auth cache
+        self.client.get("/gametypes")
+
+        # The game types referenced, then the insert in a savepoint. Every
+        # game belongs to the requesting gamer, so gamers aren't looked up
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                "/games/import", "\n".join(rows), content_type="text/csv")
+
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response["rows"], 53)
+        self.assertEqual(json_response["created"], 50)
+        self.assertEqual(json_response["error_count"], 3)
+        self.assertEqual([error["row"] for error in json_response["errors"]], [51, 52, 53])
+        self.assertIn("game_type", json_response["errors"][0]["errors"])
+        self.assertIn("number_of_players", json_response["errors"][1]["errors"])
+        self.assertIn("title", json_response["errors"][2]["errors"])
+
+        self.assertEqual(Game.objects.count(), 50)
+        self.assertEqual(Game.objects.filter(gamer_id=1).count(), 50)
+
+        response = self.client.post(
+            "/games/import", {"title": "Not a list"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_games_by_type(self):
+        """
+        Ensure games can be listed by their type.
+        """
+        GameType.objects.create(label="Card game")
+        for title, game_type in (("Clue", 1), ("Uno", 2), ("Sorry", 1)):
+            Game.objects.create(title=title, game_type_id=game_type, number_of_players=4,
+                                description="This is a test game", gamer_id=1)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        response = self.client.get("/games?type=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([game["title"] for game in json.loads(response.content)], ["Clue", "Sorry"])
+
+        response = self.client.get("/games?type=2")
+        self.assertEqual([game["title"] for game in json.loads(response.content)], ["Uno"])
+
+        # Not ids, including digits int() doesn't take and ids too
+        # large for the database
+        for game_type in ("cards", "%C2%B2", "99999999999999999999999"):
+            response = self.client.get(f"/games?type={game_type}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_games(self):
+        """
+        Ensure games can be searched by title and description, best match first.
+        """
+        GameType.objects.create(label="Card game")
+        games = {}
+        for title, game_type, description in (
+                ("Clue", 1, "Solve the murder in the mansion"),
+                ("Mansions of Madness", 1, "Explore a haunted house"),
+                ("Cluedo Card Game", 2, "The classic mystery, with cards"),
+                ("Uno", 2, "Match colors and numbers")):
+            games[title] = Game.objects.create(
+                title=title, game_type_id=game_type, number_of_players=4,
+                description=description, gamer_id=1)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        def search(query):
+            response = self.client.get(f"/games?{query}")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [game["title"] for game in json.loads(response.content)]
+
+        # Words match as prefixes, and a title match outranks a
+        # description match
+        self.assertEqual(search("q=mansion"), ["Mansions of Madness", "Clue"])
+        self.assertEqual(search("q=clu"), ["Clue", "Cluedo Card Game"])
+        self.assertEqual(search("q=clu+card"), ["Cluedo Card Game"])
+        self.assertEqual(search("q=clu&limit=1"), ["Clue"])
+        self.assertEqual(search("q=clu&type=2"), ["Cluedo Card Game"])
+        self.assertEqual(search("q=chess"), [])
+
+        # Search syntax is searched for, not obeyed
+        self.assertEqual(search('q=uno+OR+"clue*'), [])
+        self.assertEqual(search("q=uno+-match"), ["Uno"])
+
+        # Only the newest matches are ranked, but title matches are
+        # ranked on their own, so newer description matches don't push
+        # them out
+        for title in ("Clue Junior", "Uno Flip"):
+            Game.objects.create(title=title, game_type_id=1, number_of_players=4,
+                                description="Solve the mansion mystery", gamer_id=1)
+        with self.settings(LEVELUP_SEARCH_CANDIDATES=1):
+            self.assertEqual(search("q=clu"), ["Clue Junior"])
+            self.assertEqual(search("q=mansion"), ["Mansions of Madness", "Uno Flip"])
+        Game.objects.filter(title__in=("Clue Junior", "Uno Flip")).delete()
+
+        # With the token cached, the ranked ids and then their games
+        with self.assertNumQueries(2):
+            self.client.get("/games?q=clu")
+
+        # The index follows changes to games
+        game = games["Uno"]
+        game.title = "Dos"
+        game.save()
+        self.assertEqual(search("q=uno"), [])
+        self.assertEqual(search("q=dos"), ["Dos"])
+
+        games["Clue"].delete()
+        self.assertEqual(search("q=clu"), ["Cluedo Card Game"])
+
+    def test_rebuild_game_search(self):
+        """
+        Ensure the search index can be rebuilt from the games table.
+        """
+        Game.objects.create(title="Clue", game_type_id=1, number_of_players=4,
+                            description="This is a test game", gamer_id=1)
+
+        out = StringIO()
+        call_command("rebuild_game_search", stdout=out)
+        self.assertIn("Indexed 1 games for search", out.getvalue())
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/games?q=clue")
+        self.assertEqual(len(json.loads(response.content)), 1)
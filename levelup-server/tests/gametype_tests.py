@@ -0,0 +1,82 @@
+import json
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.models import GameType
+
+
+class GameTypeTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account and sample game types
+        """
+        cache.clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        GameType.objects.create(label="Board game")
+        GameType.objects.create(label="Card game")
+
+    def test_list_game_types_revalidates(self):
+        """
+        Ensure repeat clients get a 304 without touching the database.
+        """
+        response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)), 2)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/gametypes", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        # Cached body for clients without the ETag
+        with self.assertNumQueries(0):
+            response = self.client.get("/gametypes/2")
+        self.assertEqual(json.loads(response.content)["label"], "Card game")
+
+        # A change to the catalog invalidates the ETag
+        GameType.objects.create(label="Video game")
+        response = self.client.get("/gametypes", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)), 3)
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = self.client.get("/gametypes/99")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(LEVELUP_GAMETYPES_VERSION_TIMEOUT=60)
+    def test_game_types_version_expires(self):
+        """
+        Ensure a worker that missed a change, as it doesn't share the
+        cache, picks it up once its version expires.
+        """
+        response = self.client.get("/gametypes")
+        etag = response["ETag"]
+
+        # Changed by another worker, whose bump this worker never sees
+        GameType.objects.filter(label="Card game").update(label="Video game")
+        response = self.client.get("/gametypes", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        later = time.time() + 61
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            response = self.client.get("/gametypes", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(json.loads(response.content)[1]["label"], "Video game")
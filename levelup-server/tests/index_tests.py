@@ -0,0 +1,71 @@
+from datetime import date
+from django.http import QueryDict
+from django.db import connection
+from django.test import TestCase
+from levelupapi.benchmark import event_filter_plans
+from levelupapi.models import Event, EventGamer, Game, Gamer
+from levelupapi.search import check_search_triggers, missing_triggers, ranked_ids_query
+from levelupapi.seeding import seed
+from levelupapi.views.event import filter_events
+
+
+class IndexTests(TestCase):
+    """
+    Ensure the hot lookups are answered from an index, not a table scan
+    """
+
+    def test_signup_lookup_uses_unique_index(self):
+        # SQLite builds the unique constraint into the table, so its
+        # index gets an automatic name
+        plan = EventGamer.objects.filter(event_id=1, gamer_id=1).explain()
+        self.assertRegex(plan, r"INDEX \S+ \(event_id=\? AND gamer_id=\?\)")
+
+    def test_profile_events_use_gamer_index(self):
+        plan = Event.objects.filter(eventgamer__gamer_id=1).explain()
+        self.assertIn("eventgamer_gamer_event_idx", plan)
+
+    def test_calendar_order_uses_day_time_index(self):
+        plan = Event.objects.filter(event_day__gte=date.today()).order_by(
+            'event_day', 'event_time', 'id').explain()
+        self.assertIn("event_day_time_id_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_games_by_type_use_game_type_index(self):
+        plan = Game.objects.filter(game_type_id=1).explain()
+        self.assertIn("levelupapi_game_game_type_id", plan)
+
+    def test_event_filters_use_indexes(self):
+        seed(gamers=5, games=3, events=50, signups_per_event=2)
+        gamer = Gamer.objects.first()
+
+        for name, plan in event_filter_plans(gamer).items():
+            self.assertTrue(plan["index_backed"], f"{name}: {plan['plan']}")
+
+        # Equality and date range come from one index, in calendar order
+        plan = filter_events(
+            Event.objects.all(), QueryDict("game=1&to=2030-01-01"), gamer).explain()
+        self.assertIn("event_game_day_idx (game_id=? AND event_day>? AND event_day<?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_game_search_uses_full_text_index(self):
+        games = Game.objects.filter(game_type_id=1)
+        sql, params = ranked_ids_query(games, '"clu"*', 10)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = "\n".join(row[-1] for row in cursor.fetchall())
+
+        # Matches come from the FTS index, and each is checked against
+        # the filters by primary key rather than scanning games
+        self.assertIn("levelupapi_game_search VIRTUAL TABLE INDEX", plan)
+        self.assertNotIn("SCAN levelupapi_game\n", plan + "\n")
+
+    def test_game_search_triggers_exist(self):
+        self.assertEqual(missing_triggers(), [])
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+
+        # As after a migration rebuilt the games table
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER levelupapi_game_search_update")
+        errors = check_search_triggers(None, databases=['default'])
+        self.assertEqual([error.id for error in errors], ["levelupapi.E001"])
+        self.assertIn("levelupapi_game_search_update", errors[0].msg)
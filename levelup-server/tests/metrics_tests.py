@@ -0,0 +1,86 @@
+import json
+import re
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.models import Event, Game, GameType
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account and an event to sign up for
+        """
+        cache.clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+
+        game = Game.objects.create(
+            title="Clue", game_type=GameType.objects.create(label="Board game"),
+            number_of_players=4, description="Fun", gamer_id=1)
+        self.event = Event.objects.create(
+            event_day=date.today() + timedelta(days=1), event_time="14:30",
+            game=game, location="Basement", gamer_id=1)
+
+    def requests_served(self, route):
+        """
+        Requests counted so far by the duration histogram of a route
+        """
+        response = self.client.get("/metrics")
+        match = re.search(
+            r'^levelup_request_duration_seconds_count\{route="%s"\} (\d+)$' % re.escape(route),
+            response.content.decode(), re.MULTILINE)
+        return int(match.group(1)) if match else 0
+
+    @override_settings(LEVELUP_METRICS_ENABLED=True)
+    def test_server_timing_and_metrics(self):
+        """
+        Ensure each request reports its timings and feeds the histograms.
+        """
+        # Middleware is loaded on a client's first request, so start over
+        self.client = self.client_class()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.client.get("/gametypes")
+        listed = self.requests_served("Events.list")
+        signed_up = self.requests_served("Events.signup")
+
+        # When the events last changed, then the events themselves
+        response = self.client.get("/events")
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries", serializer;dur=[\d.]+$')
+        self.assertGreater(float(re.search(r'serializer;dur=([\d.]+)', timing).group(1)), 0)
+
+        self.client.post(f"/events/{self.event.id}/signup")
+
+        self.assertEqual(self.requests_served("Events.list"), listed + 1)
+        self.assertEqual(self.requests_served("Events.signup"), signed_up + 1)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        content = response.content.decode()
+        self.assertIn("# TYPE levelup_request_queries histogram", content)
+        self.assertIn('levelup_request_queries_bucket{route="Events.list",le="2"}', content)
+        self.assertNotIn('route="metrics"', content)
+
+    def test_disabled_by_default(self):
+        """
+        Ensure nothing is measured or exposed unless metrics are enabled.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/events")
+        self.assertNotIn("Server-Timing", response)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,86 @@
+import json
+from datetime import date
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.models import Event, Game, GameType
+
+
+class ProfileTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account and a game with two events
+        """
+        cache.clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        game_type = GameType.objects.create(label="Board game")
+        self.game = Game.objects.create(
+            title="Clue", game_type=game_type, number_of_players=4,
+            description="Fun", gamer_id=1)
+        self.events = [
+            Event.objects.create(event_day=date(2020, 10, 25), event_time="14:30",
+                                 game=self.game, location=location, gamer_id=1)
+            for location in ("Basement", "Attic")
+        ]
+
+    def test_profile_is_cached_until_it_changes(self):
+        """
+        Ensure the profile is built once and rebuilt after changes.
+        """
+        for event in self.events:
+            self.client.post(f"/events/{event.id}/signup")
+
+        # The token is cached by now, so just the events with their
+        # games in one query
+        with self.assertNumQueries(1):
+            response = self.client.get("/profile")
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response["gamer"]["user"]["username"], "steve")
+        self.assertEqual(len(json_response["events"]), 2)
+
+        with self.assertNumQueries(0):
+            self.client.get("/profile")
+
+        # Leaving an event
+        self.client.delete(f"/events/{self.events[0].id}/signup")
+        response = self.client.get("/profile")
+        self.assertEqual(len(json.loads(response.content)["events"]), 1)
+
+        # A change to the game of a joined event
+        self.game.title = "Cluedo"
+        self.game.save()
+        response = self.client.get("/profile")
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["events"][0]["game"]["title"], "Cluedo")
+
+        # Deleting a joined event
+        self.events[1].delete()
+        response = self.client.get("/profile")
+        self.assertEqual(json.loads(response.content)["events"], [])
+
+    def test_profile_not_cached_without_shared_cache(self):
+        """
+        Ensure a profile that can't be dropped from every worker's cache
+        isn't cached.
+        """
+        self.client.post(f"/events/{self.events[0].id}/signup")
+
+        with self.settings(LEVELUP_PROFILE_CACHE_TIMEOUT=0):
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    response = self.client.get("/profile")
+                self.assertEqual(len(json.loads(response.content)["events"]), 1)
@@ -0,0 +1,93 @@
+import json
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from levelupapi.models import Event, EventGamer, Gamer
+from levelupapi.queryinspector import QueryInspectionMixin, fingerprint, inspecting
+from levelupapi.seeding import seed
+
+
+class QueryInspectorTests(QueryInspectionMixin, APITestCase):
+    def setUp(self):
+        """
+        Seed enough rows that a query per row would stand out
+        """
+        cache.clear()
+        seed(gamers=10, games=5, events=20, signups_per_event=3)
+
+        self.gamer = Gamer.objects.filter(
+            pk__in=EventGamer.objects.values('gamer')).order_by('pk').first()
+        self.event = Event.objects.order_by('pk').first()
+        token = Token.objects.get(user_id=self.gamer.user_id)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        # Warm up the auth cache
+        self.client.get("/gametypes")
+
+    def test_fingerprint(self):
+        """
+        Ensure statements differing only in their values match.
+        """
+        self.assertEqual(
+            fingerprint('SELECT * FROM "game" WHERE "id" = 12 AND "title" = \'Clue\''),
+            fingerprint('SELECT *  FROM "game" WHERE "id" = 7 AND "title" = \'It\'\'s\''))
+        self.assertEqual(
+            fingerprint('SELECT * FROM "game" WHERE "id" IN (%s, %s, %s)'),
+            'SELECT * FROM "game" WHERE "id" IN (...)')
+
+    def test_endpoint_query_budgets(self):
+        """
+        Ensure no endpoint runs a query per row.
+        """
+        budgets = [
+            ("/gametypes", 0),
+            ("/games", 2),
+            ("/games?pagination=cursor", 2),
+            ("/games/1", 2),
+            ("/events", 2),
+            ("/events?pagination=cursor", 2),
+            (f"/events/{self.event.id}", 2),
+            ("/events/export", 2),
+            ("/profile", 1),
+        ]
+        for url, budget in budgets:
+            with self.subTest(url=url), self.assertMaxQueries(budget):
+                response = self.client.get(url)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+
+    def test_n_plus_one_detected(self):
+        """
+        Ensure a query per row fails the budget, naming the repeated query.
+        """
+        with inspecting() as inspection:
+            titles = [event.game.title for event in Event.objects.all()]
+
+        self.assertEqual(len(titles), 20)
+        statement, count, serializer = inspection.repeated()[0]
+        self.assertEqual(count, 20)
+        self.assertIn('FROM "levelupapi_game"', statement)
+        self.assertIsNone(serializer)
+
+        with self.assertRaisesRegex(AssertionError, "N\\+1 queries"):
+            with self.assertMaxQueries(25):
+                [event.game.title for event in Event.objects.all()]
+
+    @override_settings(LEVELUP_QUERY_INSPECTOR_SAMPLE_RATE=1, LEVELUP_SLOW_QUERY_MS=0)
+    def test_sampled_requests_logged(self):
+        """
+        Ensure inspected requests log their slow queries with their origin.
+        """
+        # Middleware is loaded on a client's first request, so start over
+        token = self.client._credentials["HTTP_AUTHORIZATION"]
+        self.client = self.client_class()
+        self.client.credentials(HTTP_AUTHORIZATION=token)
+
+        with self.assertLogs("levelupapi.queries", "WARNING") as logs:
+            self.client.get("/events")
+
+        entries = [json.loads(line.split(":", 2)[2]) for line in logs.output]
+        self.assertTrue(all(entry["event"] == "slow_query" for entry in entries))
+        self.assertTrue(all(entry["route"] == "Events.list" for entry in entries))
+        self.assertIn("EventSerializer(many=True)", [entry["serializer"] for entry in entries])
@@ -0,0 +1,118 @@
+import json
+from unittest import mock
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from levelupapi.models import Game, GameType
+from levelupapi.routers import ReplicaRouter, read_database, recent_write_key
+from levelupapi.views import Games
+
+
+@override_settings(LEVELUP_READ_DATABASE='replica')
+class ReplicaTests(APITestCase):
+    """
+    The views' reads are recorded rather than run, as the test settings
+    have no replica database
+    """
+
+    def setUp(self):
+        """
+        Create two accounts and a game type
+        """
+        cache.clear()
+
+        self.tokens = []
+        for username in ("steve", "joe"):
+            data = {
+                "username": username,
+                "password": "Admin8*",
+                "email": f"{username}@stevebrownlee.com",
+                "first_name": username.title(),
+                "last_name": "Brownlee",
+                "bio": "Love those gamez!!"
+            }
+            response = self.client.post("/register", data, format='json')
+            self.tokens.append(json.loads(response.content)["token"])
+
+        GameType.objects.create(label="Board game")
+
+    def list_games(self, token):
+        """
+        GET /games, returning the database the view would have read from
+        """
+        databases = []
+
+        def record_database(viewset, request):
+            databases.append(read_database.get())
+            return Response([])
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        with mock.patch.object(Games, 'list', record_database):
+            response = self.client.get("/games")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return databases[0]
+
+    def test_router(self):
+        """
+        Ensure reads follow the request's database and writes the primary.
+        """
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Game))
+
+        reset = read_database.set('replica')
+        try:
+            self.assertEqual(router.db_for_read(Game), 'replica')
+            self.assertEqual(router.db_for_write(Game), DEFAULT_DB_ALIAS)
+        finally:
+            read_database.reset(reset)
+
+    def test_reads_go_to_replica(self):
+        """
+        Ensure GET requests read from the replica, and only while they run.
+        """
+        self.assertEqual(self.list_games(self.tokens[0]), 'replica')
+        self.assertIsNone(read_database.get())
+
+        with override_settings(LEVELUP_READ_DATABASE=None):
+            self.assertIsNone(self.list_games(self.tokens[0]))
+
+    def test_read_your_writes(self):
+        """
+        Ensure a user who just wrote reads from the primary for a while.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.tokens[0])
+        data = {
+            "title": "Clue",
+            "game_type": 1,
+            "number_of_players": 6,
+            "description": "This is a test game",
+        }
+        response = self.client.post("/games", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # The writer sticks to the primary, everybody else doesn't
+        self.assertIsNone(self.list_games(self.tokens[0]))
+        self.assertEqual(self.list_games(self.tokens[1]), 'replica')
+
+        # Until the window is over
+        cache.delete(recent_write_key(Game.objects.get().gamer.user_id))
+        self.assertEqual(self.list_games(self.tokens[0]), 'replica')
+
+    def test_cached_reads_come_from_primary(self):
+        """
+        Ensure what is cached for a long time isn't read from a lagging
+        replica. The test settings have no replica, so a read from it fails.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.tokens[0])
+
+        response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)[0]["label"], "Board game")
+
+        response = self.client.get("/profile")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["events"], [])
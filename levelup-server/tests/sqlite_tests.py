@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import threading
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+from levelupapi.sqlite import pragma_statement
+
+
+class SQLiteTests(SimpleTestCase):
+    """
+    Runs against a database file of its own, since the test database
+    lives in memory and can't use WAL
+    """
+
+    def setUp(self):
+        """
+        Create an empty database file with one table
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'levelup.sqlite3')
+
+        database = self.open_database()
+        with database.cursor() as cursor:
+            cursor.execute('CREATE TABLE seat (id INTEGER PRIMARY KEY, writer INTEGER NOT NULL)')
+        database.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open_database(self):
+        """
+        A Django connection to the database file, which fires
+        `connection_created` like any other connection when first used
+        """
+        return DatabaseWrapper({**connection.settings_dict, 'NAME': self.path}, alias='tuning')
+
+    def test_pragmas_applied_to_new_connections(self):
+        """
+        Ensure each new connection is switched to WAL and tuned.
+        """
+        database = self.open_database()
+        with database.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -20000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+        database.close()
+
+    @override_settings(LEVELUP_SQLITE_PRAGMAS={'journal_mode': 'wal; DROP TABLE seat'})
+    def test_pragma_values_are_checked(self):
+        """
+        Ensure settings can't smuggle SQL into a PRAGMA.
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            self.open_database().ensure_connection()
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statement('cache_size', '-2000; DROP TABLE seat')
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statement('writable_schema', 'on')
+
+    def test_parallel_readers_and_writers(self):
+        """
+        Ensure readers and writers running side by side never hit
+        "database is locked".
+        """
+        writers = 4
+        readers = 4
+        rows_per_writer = 50
+        errors = []
+        start = threading.Barrier(writers + readers)
+
+        def write(writer):
+            database = self.open_database()
+            try:
+                start.wait()
+                for _ in range(rows_per_writer):
+                    with database.cursor() as cursor:
+                        cursor.execute('INSERT INTO seat (writer) VALUES (%s)', [writer])
+            except Exception as ex:  # pylint: disable=broad-except
+                errors.append(ex)
+            finally:
+                database.close()
+
+        def read():
+            database = self.open_database()
+            try:
+                start.wait()
+                for _ in range(rows_per_writer):
+                    with database.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM seat')
+                        cursor.fetchone()
+            except Exception as ex:  # pylint: disable=broad-except
+                errors.append(ex)
+            finally:
+                database.close()
+
+        threads = [threading.Thread(target=write, args=(writer,)) for writer in range(writers)]
+        threads += [threading.Thread(target=read) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        database = self.open_database()
+        with database.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM seat')
+            self.assertEqual(cursor.fetchone()[0], writers * rows_per_writer)
+        database.close()
@@ -0,0 +1,129 @@
+import json
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.throttling import take_token
+
+RATES = {
+    'gamer': '3/minute',
+    'login': '100/minute',
+    'login_username': '2/minute',
+    'register': '1/hour',
+}
+
+
+@override_settings(LEVELUP_THROTTLE_ENABLED=True, LEVELUP_THROTTLE_RATES=RATES)
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account, then start with full buckets
+        """
+        cache.clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+
+        cache.clear()
+
+    def test_login_attempts_throttled_per_username(self):
+        """
+        Ensure guessing one gamer's password is cut off before hashing.
+        """
+        credentials = {"username": "steve", "password": "guess"}
+        with mock.patch("levelupapi.views.auth.authenticate", return_value=None) as authenticate:
+            for _ in range(2):
+                response = self.client.post("/login", credentials, format='json')
+                self.assertFalse(json.loads(response.content)["valid"])
+
+            response = self.client.post("/login", credentials, format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertGreaterEqual(int(response["Retry-After"]), 1)
+            self.assertEqual(authenticate.call_count, 2)
+
+            # Other gamers can still log in
+            response = self.client.post(
+                "/login", {"username": "joe", "password": "guess"}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_register_throttled_per_address(self):
+        """
+        Ensure one address can't create accounts in bulk.
+        """
+        data = {
+            "username": "joe",
+            "password": "Admin8*",
+            "email": "joe@stevebrownlee.com",
+            "first_name": "Joe",
+            "last_name": "Shepherd",
+            "bio": "Hi"
+        }
+        response = self.client.post("/register", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        data["username"] = "jack"
+        response = self.client.post("/register", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_is_not_trusted(self):
+        """
+        Ensure rotating X-Forwarded-For doesn't get an address a new budget.
+        """
+        data = {
+            "username": "joe",
+            "password": "Admin8*",
+            "email": "joe@stevebrownlee.com",
+            "first_name": "Joe",
+            "last_name": "Shepherd",
+            "bio": "Hi"
+        }
+        response = self.client.post(
+            "/register", data, format='json', HTTP_X_FORWARDED_FOR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        data["username"] = "jack"
+        response = self.client.post(
+            "/register", data, format='json', HTTP_X_FORWARDED_FOR="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Behind one proxy, the address it forwards is the client's
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            response = self.client.post(
+                "/register", data, format='json', HTTP_X_FORWARDED_FOR="10.0.0.2")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_api_throttled_per_gamer(self):
+        """
+        Ensure each gamer gets their own budget of API requests.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        for _ in range(3):
+            response = self.client.get("/gametypes")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get("/gametypes")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+    def test_bucket_refills(self):
+        """
+        Ensure a token comes back after its share of the period.
+        """
+        with mock.patch("levelupapi.throttling.time.time", return_value=1000.0):
+            self.assertEqual(take_token("login_username", "steve"), 0)
+            self.assertEqual(take_token("login_username", "steve"), 0)
+            self.assertEqual(take_token("login_username", "steve"), 30)
+
+        with mock.patch("levelupapi.throttling.time.time", return_value=1030.0):
+            self.assertEqual(take_token("login_username", "steve"), 0)